@@ -12,7 +12,7 @@ class PurchaseOrder(Base):
     # คอลัมน์หลักและข้อมูลทั่วไปของ PO
     po_id = Column(Integer, primary_key=True, autoincrement=True, comment='รหัส PO')
     po_poid = Column(Integer, comment='รหัส PO')
-    po_pono = Column(String(100), comment='เลขที่ PO')
+    po_pono = Column(String(100), index=True, comment='เลขที่ PO')
     po_podate = Column(Date, comment='วันที่ PO')
     po_project = Column(String(30), comment='รหัสโครงการ')
     po_system = Column(String(10), comment='รหัสระบบ')
@@ -117,7 +117,7 @@ class PurchaseOrderItem(Base):
     poi_deduct_status = Column(String(50), comment='สถานะการหัก')
     poi_sumdeduct = Column(Numeric(65,2), comment='ยอดรวมหัก')
     poi_project = Column(String(10), comment='รหัสโครงการ')
-    poid = Column(Integer, ForeignKey('po.po_id'), comment='รหัส PO')
+    poid = Column(Integer, ForeignKey('po.po_id'), index=True, comment='รหัส PO')
 
     # Foreign Key และ Relationship
     purchase_order = relationship("PurchaseOrder", back_populates="items", foreign_keys=[poid])
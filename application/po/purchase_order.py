@@ -1,27 +1,30 @@
-from fastapi import APIRouter, HTTPException, Depends
-from sqlalchemy.orm import Session
-from sqlalchemy import create_engine
-from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
-import os
-from dotenv import load_dotenv
+from fastapi import APIRouter, HTTPException, Depends, Response, Request, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select, insert, update, exists, or_, func, literal
+from sqlalchemy.ext.asyncio import AsyncSession
+from core.database import get_db, get_read_db, open_read_session
+from core.docnumber import next_po_number
+from core.pagination import paginate, split_page, NEXT_CURSOR_HEADER
+from core.fields import parse_fields, select_fields, load_children
+from core.etag import make_etag, etag_matches, not_modified
 from .models import PurchaseOrder, PurchaseOrderItem
 from ..pr.prModels import PrItem,Pr
-from typing import List
-from pydantic import BaseModel
+from setup.users.current_user import CurrentUser, get_current_user
+from typing import List, Annotated
+from pydantic import BaseModel, ConfigDict, BeforeValidator
 from datetime import datetime, date
-
-# โหลด environment variables
-load_dotenv()
-
-# สร้าง SessionLocal class
-DATABASE_URL = os.getenv("DATABASE_URL")
-print("DATABASE_URL",DATABASE_URL)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=create_engine(DATABASE_URL or ""))
+from decimal import Decimal
+import os
+import io
+import csv
+import orjson
 
 # สร้าง router
 router = APIRouter()
 
+# จำนวนแถวที่ดึงจาก server-side cursor ต่อรอบตอน export
+PO_EXPORT_CHUNK_SIZE = int(os.getenv("PO_EXPORT_CHUNK_SIZE", 1000))
+
 # Pydantic models สำหรับ PO Item
 class POItemBase(BaseModel):
     poi_matname: str
@@ -75,7 +78,7 @@ class POItemCreate(POItemBase):
 # Pydantic models สำหรับ PO
 class POBase(BaseModel):
     po_poid: int | None = None
-    po_pono: str
+    po_pono: str | None = None
     po_podate: date
     po_project: str
     po_system: str | None = None
@@ -132,161 +135,390 @@ class POBase(BaseModel):
 class POCreate(POBase):
     pass
 
-# Dependency
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+# Response schemas: FastAPI ตรวจและแปลง ORM object ครั้งเดียวด้วย pydantic-core
+# แล้วส่งให้ ORJSONResponse (default response class) เขียน JSON
+StrippedStr = Annotated[str | None, BeforeValidator(lambda v: v.strip() if isinstance(v, str) else v)]
+
+class POItemOut(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    poi_id: int
+    poi_matname: str | None = None
+    poi_matcode: str | None = None
+    poi_ref: str | None = None
+    poi_costname: str | None = None
+    poi_costcode: str | None = None
+    poi_qty: float | None = None
+    poi_unit: str | None = None
+    poi_priceunit: float | None = None
+    poi_amount: float | None = None
+    poi_discountper1: float | None = None
+    poi_discountper2: float | None = None
+
+class POSummaryOut(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    po_id: int
+    po_pono: str | None = None
+    po_podate: date | None = None
+    po_project: str | None = None
+    po_vender: StrippedStr = None
+    po_status: str | None = None
+    po_approve: str | None = None
+    # ไม่มีใน response เมื่อไม่ได้โหลด items (ใช้คู่กับ response_model_exclude_unset)
+    items: List[POItemOut] | None = None
+
+class PODetailOut(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    po_id: int
+    po_pono: str | None = None
+    po_podate: date | None = None
+    po_project: str | None = None
+    po_system: str | None = None
+    po_department: str | None = None
+    po_memid: str | None = None
+    po_prname: str | None = None
+    po_trem: str | None = None
+    po_contact: str | None = None
+    po_prno: str | None = None
+    po_contactno: str | None = None
+    po_quono: str | None = None
+    po_deliverydate: date | None = None
+    po_place: str | None = None
+    po_remark: str | None = None
+    po_venderid: int | None = None
+    po_vender: StrippedStr = None
+    po_vatper: int | None = None
+    items: List[POItemOut] = []
+
+# PR Item ที่ยังไม่ได้เปิด PO
+PR_ITEM_PENDING = or_(PrItem.pri_status.is_(None), PrItem.pri_status != 'open')
+
+async def refresh_pr_po_open(db: AsyncSession, pr_prno: str, compcode: str | None) -> bool:
+    """ตั้ง po_open='open' ให้ PR ถ้า PR Item ทุกรายการเปิด PO แล้ว (ตรวจใน query เดียว)
+    ต้องเรียกใน transaction เดียวกับการสร้าง PO เพื่อให้สถานะ PR ตรงกับ items เสมอ คืน False ถ้าไม่พบ PR"""
+    pending_items = exists().where(
+        PrItem.pri_ref == Pr.pr_prno,
+        PrItem.compcode == Pr.compcode,
+        PR_ITEM_PENDING
+    )
+    pr_result = (await db.execute(
+        select(Pr.pr_prid, (~pending_items).label("all_open"))
+        .filter(Pr.pr_prno == pr_prno, Pr.compcode == compcode)
+    )).first()
+    if not pr_result:
+        return False
+    if pr_result.all_open:
+        await db.execute(
+            update(Pr)
+            .where(Pr.pr_prid == pr_result.pr_prid)
+            .values(po_open='open')
+            .execution_options(synchronize_session=False)
+        )
+    return True
 
 @router.post("/", response_model=dict)
-async def create_purchase_order(po: POCreate, db: Session = Depends(get_db)):
+async def create_purchase_order(po: POCreate, db: AsyncSession = Depends(get_db)):
     # ตรวจสอบข้อมูลที่จำเป็น
     if not po.po_venderid or not po.po_vender:
         raise HTTPException(status_code=400, detail="กรุณาระบุข้อมูลผู้จำหน่าย")
         
     if not po.items or len(po.items) == 0:
         raise HTTPException(status_code=400, detail="กรุณาระบุรายการสินค้า")
+
+    for item in po.items:
+        if not item.poi_matcode or not item.poi_qty or not item.poi_unit:
+            raise HTTPException(status_code=400, detail="ข้อมูลรายการสินค้าไม่ครบถ้วน")
     
     # สร้าง PO
     try:
-        po_count = db.query(PurchaseOrder).filter().count()
+        # ออกเลขที่ PO จากตัวนับ (ไม่ใช้ count() ซึ่งช้าและได้เลขซ้ำเมื่อสร้างพร้อมกัน)
+        po_poid, po_pono = await next_po_number(po.compcode, po.po_podate)
 
         db_po = PurchaseOrder(
-            po_poid = po_count + 1,
-            **po.model_dump(exclude={"items", "po_poid"})
+            po_poid = po_poid,
+            po_pono = po.po_pono or po_pono,
+            **po.model_dump(exclude={"items", "po_poid", "po_pono"})
         )
         
         db.add(db_po)
-        db.flush() # เพื่อให้ได้ po_id ก่อน commit
+        await db.flush() # เพื่อให้ได้ po_id ก่อน commit
+        po_id = db_po.po_id
         
-        # ตรวจสอบ PO
-        po_result = db.query(PurchaseOrder).filter(PurchaseOrder.po_pono == po.po_pono).first()
-        if po_result is None:
-            raise HTTPException(status_code=400, detail="ไม่พบ PO ที่มีหมายเลขนี้")
-        po_id = po_result.po_id
-        
-        # สร้าง PO Items
-        for item in po.items:
-            if not item.poi_matcode or not item.poi_qty or not item.poi_unit:
-                raise HTTPException(status_code=400, detail="ข้อมูลรายการสินค้าไม่ครบถ้วน")
-                
-            item_dict = item.model_dump()
-            item_dict['poid'] = po_id
-            db.add(PurchaseOrderItem(**item_dict))
-
-            # อัพเดทสถานะ PR Item
-            pr_item = db.query(PrItem).filter(PrItem.pri_id == item.pri_id).first()
-            if pr_item:
-                pr_item.__setattr__('pri_status', 'open')
-                db.add(pr_item)
-        db.commit()
-
-        # ตรวจสอบและอัพเดทสถานะ PR
-        pr_result = db.query(Pr).filter(Pr.pr_prno == po.po_prno, Pr.compcode == po.compcode).first()
-        if not pr_result:
+        # สร้าง PO Items ด้วย bulk insert ครั้งเดียว
+        await db.execute(
+            insert(PurchaseOrderItem),
+            [{**item.model_dump(), "poid": po_id} for item in po.items]
+        )
+
+        # อัพเดทสถานะ PR Item ทั้งหมดด้วย UPDATE ... WHERE pri_id IN (...) ครั้งเดียว
+        pri_ids = {item.pri_id for item in po.items if item.pri_id is not None}
+        if pri_ids:
+            await db.execute(
+                update(PrItem)
+                .where(PrItem.pri_id.in_(pri_ids))
+                .values(pri_status='open')
+                .execution_options(synchronize_session=False)
+            )
+
+        if not await refresh_pr_po_open(db, po.po_prno, po.compcode):
             raise HTTPException(status_code=400, detail="ไม่พบ PR ที่เกี่ยวข้อง")
             
-        pri_count = db.query(PrItem).filter(
-            PrItem.pri_status == 'open',
-            PrItem.pri_ref == po.po_prno,
-            PrItem.compcode == po.compcode
-        ).count()
-        
-        pri_count_all = db.query(PrItem).filter(
-            PrItem.pri_ref == po.po_prno,
-            PrItem.compcode == po.compcode
-        ).count()
-        
-        if pri_count == pri_count_all:
-            pr_result.__setattr__('po_open', 'open')
-            db.add(po_result)
-            
-        db.commit()
-        db.refresh(po_result)
+        await db.commit()
         
-        return {"message": "สร้าง PO สำเร็จ", "po_id": po_id}
+        return {"message": "สร้าง PO สำเร็จ", "po_id": po_id, "po_pono": db_po.po_pono}
         
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=400, detail=f"เกิดข้อผิดพลาด: {str(e)}")
 
-@router.get("/{po_id}", response_model=dict)
-async def read_purchase_order(po_id: int, db: Session = Depends(get_db)):
-    po = db.query(PurchaseOrder).filter(PurchaseOrder.po_id == po_id).first()
-    if po is None:
+class POFromPr(BaseModel):
+    po_venderid: int
+    po_vender: str
+    # ไม่ระบุ = ทุกรายการของ PR ที่ยังไม่ได้เปิด PO
+    pri_ids: List[int] | None = None
+    po_podate: date | None = None
+    po_deliverydate: date | None = None
+    po_contact: str = ''
+    po_quono: str | None = None
+    po_remark: str | None = None
+    po_vatper: int = 7
+
+# คอลัมน์ PO Item ที่คัดลอกจาก PR Item ด้วย INSERT ... SELECT (poid และ poi_vatper ใส่เพิ่มตอนสร้าง)
+PO_ITEM_FROM_PR_ITEM = {
+    "poi_matname": func.coalesce(PrItem.pri_matname, ''),
+    "poi_matcode": PrItem.pri_matcode,
+    "poi_ref": PrItem.pri_ref,
+    "poi_costname": PrItem.pri_costname,
+    "poi_costcode": PrItem.pri_costcode,
+    "poi_qty": PrItem.pri_qty,
+    "poi_unit": PrItem.pri_unit,
+    "poi_priceunit": PrItem.pri_priceunit,
+    "poi_amount": PrItem.pri_amount,
+    "poi_discountper1": PrItem.pri_discountper1,
+    "poi_discountper2": PrItem.pri_discountper2,
+    "poi_discountper3": PrItem.pri_discountper3,
+    "poi_discountper4": PrItem.pri_discountper4,
+    "poi_disamt": PrItem.pri_disamt,
+    "poi_vat": PrItem.pri_vat,
+    "poi_netamt": PrItem.pri_netamt,
+    "compcode": PrItem.compcode,
+    "pri_id": PrItem.pri_id,
+    "pr_no": PrItem.pri_ref,
+    "cost_type": PrItem.cost_type,
+    "remark_mat": PrItem.remark_mat,
+    "datesend": PrItem.datesend,
+    "poi_project": PrItem.pri_project,
+}
+
+@router.post("/from-pr/{pr_prid}", response_model=dict)
+async def create_purchase_order_from_pr(pr_prid: int, body: POFromPr, current_user: CurrentUser = Depends(get_current_user), db: AsyncSession = Depends(get_db)):
+    """สร้าง PO จาก PR ฝั่ง server: คัดลอก PR Item ด้วย INSERT ... SELECT และเปิดสถานะ PR Item ใน transaction เดียว"""
+    try:
+        pr = (await db.execute(
+            select(Pr.pr_prno, Pr.compcode, Pr.pr_project, Pr.pr_system, Pr.pr_department,
+                   Pr.pr_memid, Pr.pr_reqname, Pr.pr_deliplace)
+            .filter(Pr.pr_prid == pr_prid)
+        )).first()
+        if pr is None:
+            raise HTTPException(status_code=404, detail="ไม่พบ PR")
+
+        item_filter = [PrItem.pri_ref == pr.pr_prno, PrItem.compcode == pr.compcode, PR_ITEM_PENDING]
+        if body.pri_ids is not None:
+            item_filter.append(PrItem.pri_id.in_(body.pri_ids))
+
+        async def pending_item_ids(lock: bool) -> list[int]:
+            query = select(PrItem.pri_id).filter(*item_filter).order_by(PrItem.pri_id)
+            pri_ids = (await db.execute(query.with_for_update() if lock else query)).scalars().all()
+            if body.pri_ids is not None:
+                invalid = sorted(set(body.pri_ids) - set(pri_ids))
+                if invalid:
+                    raise HTTPException(status_code=400, detail={"message": "รายการไม่อยู่ใน PR หรือเปิด PO แล้ว", "pri_ids": invalid})
+            if not pri_ids:
+                raise HTTPException(status_code=400, detail="PR นี้ไม่มีรายการที่ยังไม่ได้เปิด PO")
+            return pri_ids
+
+        # ตรวจรายการก่อนออกเลข แล้วคืน connection ก่อนจองเลข PO
+        # (ตัวออกเลขใช้ connection ของตัวเอง ถ้าถือ connection และ row lock ค้างไว้ pool อาจหมดเมื่อมีหลาย request พร้อมกัน)
+        await pending_item_ids(lock=False)
+        await db.commit()
+        po_date = body.po_podate or date.today()
+        po_poid, po_pono = await next_po_number(pr.compcode, po_date)
+
+        # ล็อกรายการที่จะเปิด PO กันการเปิดซ้ำจาก request อื่นพร้อมกัน แล้วตรวจซ้ำอีกครั้ง
+        pri_ids = await pending_item_ids(lock=True)
+
+        db_po = PurchaseOrder(
+            po_poid=po_poid,
+            po_pono=po_pono,
+            po_podate=po_date,
+            po_project=pr.pr_project,
+            po_system=pr.pr_system,
+            po_department=pr.pr_department,
+            po_memid=current_user.m_code,
+            po_prname=pr.pr_reqname,
+            po_prno=pr.pr_prno,
+            po_contact=body.po_contact,
+            po_quono=body.po_quono,
+            po_deliverydate=body.po_deliverydate,
+            po_place=pr.pr_deliplace,
+            po_remark=body.po_remark,
+            po_venderid=body.po_venderid,
+            po_vender=body.po_vender,
+            po_vatper=body.po_vatper,
+            compcode=pr.compcode,
+            useradd=current_user.m_code,
+            usercreate=datetime.now(),
+        )
+        db.add(db_po)
+        await db.flush() # เพื่อให้ได้ po_id ก่อน insert items
+        po_id = db_po.po_id
+
+        # คัดลอก PR Item เป็น PO Item ในคำสั่งเดียว (ข้อมูลไม่ต้องผ่าน client หรือ Python)
+        await db.execute(
+            insert(PurchaseOrderItem).from_select(
+                ["poid", "poi_vatper", *PO_ITEM_FROM_PR_ITEM],
+                select(literal(po_id), literal(body.po_vatper), *PO_ITEM_FROM_PR_ITEM.values())
+                .filter(PrItem.pri_id.in_(pri_ids))
+                .order_by(PrItem.pri_id)
+            )
+        )
+        await db.execute(
+            update(PrItem)
+            .where(PrItem.pri_id.in_(pri_ids))
+            .values(pri_status='open', pri_pono=po_pono)
+            .execution_options(synchronize_session=False)
+        )
+        await refresh_pr_po_open(db, pr.pr_prno, pr.compcode)
+        await db.commit()
+
+        return {"message": "สร้าง PO สำเร็จ", "po_id": po_id, "po_pono": po_pono, "items": len(pri_ids)}
+
+    except HTTPException:
+        await db.rollback()
+        raise
+    except Exception as e:
+        await db.rollback()
+        raise HTTPException(status_code=400, detail=f"เกิดข้อผิดพลาด: {str(e)}")
+
+# คอลัมน์ของไฟล์ export: 1 แถวต่อ 1 รายการสินค้า (PO ที่ไม่มีรายการได้ 1 แถวที่ช่องสินค้าว่าง)
+PO_EXPORT_COLUMNS = [
+    PurchaseOrder.po_id, PurchaseOrder.po_pono, PurchaseOrder.po_podate, PurchaseOrder.po_project,
+    PurchaseOrder.po_department, PurchaseOrder.po_prno, PurchaseOrder.po_venderid, PurchaseOrder.po_vender,
+    PurchaseOrder.po_status, PurchaseOrder.po_approve, PurchaseOrder.compcode,
+    PurchaseOrderItem.poi_id, PurchaseOrderItem.poi_matcode, PurchaseOrderItem.poi_matname,
+    PurchaseOrderItem.poi_qty, PurchaseOrderItem.poi_unit, PurchaseOrderItem.poi_priceunit,
+    PurchaseOrderItem.poi_amount, PurchaseOrderItem.poi_discountper1, PurchaseOrderItem.poi_discountper2,
+    PurchaseOrderItem.poi_vat, PurchaseOrderItem.poi_netamt,
+]
+PO_EXPORT_FIELDS = [column.key for column in PO_EXPORT_COLUMNS]
+
+def _json_default(value):
+    if isinstance(value, Decimal):
+        return float(value)
+    raise TypeError
+
+def _ndjson_chunk(rows) -> bytes:
+    return b"".join(
+        orjson.dumps(dict(zip(PO_EXPORT_FIELDS, row)), default=_json_default) + b"\n" for row in rows
+    )
+
+def _csv_chunk(rows, header: bool = False) -> bytes:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if header:
+        writer.writerow(PO_EXPORT_FIELDS)
+    writer.writerows(rows)
+    return buffer.getvalue().encode("utf-8")
+
+async def _stream_export(db: AsyncSession, query, format: str):
+    # session ต้องเปิดอยู่ตลอดการ stream จึงปิดเองที่นี่ (dependency จะปิดก่อนส่ง body)
+    async with db:
+        result = await db.stream(query.execution_options(yield_per=PO_EXPORT_CHUNK_SIZE))
+        if format == "csv":
+            yield b"\xef\xbb\xbf" + _csv_chunk([], header=True)  # BOM ให้ Excel อ่านภาษาไทยได้
+        async for rows in result.partitions():
+            yield _csv_chunk(rows) if format == "csv" else _ndjson_chunk(rows)
+
+@router.get("/export")
+async def export_purchase_orders(
+    request: Request,
+    format: str = "ndjson",
+    date_from: date | None = Query(None, alias="from"),
+    date_to: date | None = Query(None, alias="to"),
+    compcode: str | None = None,
+):
+    """export PO พร้อมรายการสินค้าแบบ streaming อ่านจาก server-side cursor ทีละ chunk หน่วยความจำคงที่"""
+    if format not in ("ndjson", "csv"):
+        raise HTTPException(status_code=400, detail="format ต้องเป็น ndjson หรือ csv")
+
+    query = (
+        select(*PO_EXPORT_COLUMNS)
+        .outerjoin(PurchaseOrderItem, PurchaseOrderItem.poid == PurchaseOrder.po_id)
+        .order_by(PurchaseOrder.po_id, PurchaseOrderItem.poi_id)
+    )
+    if date_from:
+        query = query.filter(PurchaseOrder.po_podate >= date_from)
+    if date_to:
+        query = query.filter(PurchaseOrder.po_podate <= date_to)
+    if compcode:
+        query = query.filter(PurchaseOrder.compcode == compcode)
+
+    db = await open_read_session(request)
+    media_type = "text/csv; charset=utf-8" if format == "csv" else "application/x-ndjson"
+    return StreamingResponse(
+        _stream_export(db, query, format),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="purchase_orders.{format}"'},
+    )
+
+# คอลัมน์ที่บอกเวอร์ชันของ PO ใช้สร้าง ETag โดยไม่ต้องโหลดทั้งแถว
+PO_VERSION_COLUMNS = [
+    PurchaseOrder.usercreate, PurchaseOrder.editdate, PurchaseOrder.deletedate,
+    PurchaseOrder.po_status, PurchaseOrder.po_approve, PurchaseOrder.po_open,
+    select(func.count(PurchaseOrderItem.poi_id)).where(PurchaseOrderItem.poid == PurchaseOrder.po_id).scalar_subquery(),
+    select(func.max(PurchaseOrderItem.poi_id)).where(PurchaseOrderItem.poid == PurchaseOrder.po_id).scalar_subquery(),
+]
+
+@router.get("/{po_id}", response_model=PODetailOut, response_model_exclude_unset=True)
+async def read_purchase_order(po_id: int, request: Request, response: Response, fields: str | None = None, db: AsyncSession = Depends(get_read_db)):
+    # ?fields=po_pono,po_vender,items เลือกเฉพาะ field ที่ต้องการ (ค่าเริ่มต้นคือทุก field ของ PODetailOut)
+    selected = parse_fields(fields, PODetailOut.model_fields, always=("po_id",)) or list(PODetailOut.model_fields)
+
+    # ตรวจเวอร์ชันด้วย query เล็ก ๆ ก่อน ถ้า client มีข้อมูลล่าสุดแล้วตอบ 304 โดยไม่โหลด/serialize ข้อมูล
+    version = (await db.execute(select(*PO_VERSION_COLUMNS).filter(PurchaseOrder.po_id == po_id))).first()
+    if version is None:
         raise HTTPException(status_code=404, detail="ไม่พบ PO")
-    
-    print(po_id)
-    items = db.query(PurchaseOrderItem).filter(PurchaseOrderItem.poid == po_id).all()
-    
-    return {
-        "po_id": po.po_id,
-        "po_pono": po.po_pono,
-        "po_podate": po.po_podate.isoformat(),
-        "po_project": po.po_project,
-        "po_system": po.po_system,
-        "po_department": po.po_department,
-        "po_memid": po.po_memid,
-        "po_prname": po.po_prname,
-        "po_trem": po.po_trem,
-        "po_contact": po.po_contact,
-        "po_prno": po.po_prno,
-        "po_contactno": po.po_contactno,
-        "po_quono": po.po_quono,
-        "po_deliverydate": po.po_deliverydate.isoformat(),
-        "po_place": po.po_place,
-        "po_remark": po.po_remark,
-        "po_venderid": po.po_venderid,
-        "po_vender": po.po_vender.strip(),
-        "po_vatper": po.po_vatper,
-        "items": [{
-            "poi_id": item.poi_id,
-            "poi_matname": item.poi_matname,
-            "poi_matcode": item.poi_matcode,
-            "poi_ref": item.poi_ref,
-            "poi_costname": item.poi_costname,
-            "poi_costcode": item.poi_costcode,
-            "poi_qty": item.poi_qty,
-            "poi_unit": item.poi_unit,
-            "poi_priceunit": item.poi_priceunit,
-            "poi_amount": item.poi_amount, 
-            "poi_discountper1": item.poi_discountper1,
-            "poi_discountper2": item.poi_discountper2
-        } for item in items]
-    }
-
-
-@router.get("/", response_model=List[dict])
-async def read_purchase_orders(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    pos = db.query(PurchaseOrder).offset(skip).limit(limit).all()
-    result = []
-    
-    for po in pos:
-        items = db.query(PurchaseOrderItem).filter(PurchaseOrderItem.poid == po.po_id).all()
-        result.append({
-            "po_id": po.po_id,
-            "po_pono": po.po_pono,
-            "po_podate": po.po_podate.isoformat(),
-            "po_project": po.po_project,
-            "po_vender": po.po_vender.strip(),
-            "po_status": po.po_status,
-            "po_approve": po.po_approve,
-            "items": [{
-                "poi_id": item.poi_id,
-                "poi_matname": item.poi_matname,
-                "poi_matcode": item.poi_matcode,
-                "poi_ref": item.poi_ref,
-                "poi_costname": item.poi_costname,
-                "poi_costcode": item.poi_costcode,
-                "poi_qty": item.poi_qty,
-                "poi_unit": item.poi_unit,
-                "poi_priceunit": item.poi_priceunit,
-                "poi_amount": item.poi_amount, 
-                "poi_discountper1": item.poi_discountper1,
-                "poi_discountper2": item.poi_discountper2
-            } for item in items]
-        })
-    
-    return result
+    etag = make_etag("po", po_id, selected, *version)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    response.headers["ETag"] = etag
+
+    row = (await db.execute(select_fields(PurchaseOrder, selected).filter(PurchaseOrder.po_id == po_id))).first()
+    if row is None:
+        raise HTTPException(status_code=404, detail="ไม่พบ PO")
+    po = row._asdict()
+    if "items" in selected:
+        po["items"] = (await load_children(db, PurchaseOrderItem, PurchaseOrderItem.poid, [po_id]))[po_id]
+    return po
+
+
+@router.get("/", response_model=List[POSummaryOut], response_model_exclude_unset=True)
+async def read_purchase_orders(response: Response, skip: int = Query(0, ge=0), limit: int = Query(100, ge=1), cursor: str | None = None, include_items: bool = True, fields: str | None = None, db: AsyncSession = Depends(get_read_db)):
+    # ถ้าระบุ fields จะได้ items เฉพาะเมื่อขอ "items" ใน fields
+    selected = parse_fields(fields, POSummaryOut.model_fields, always=("po_id",))
+    if selected is None:
+        selected = [name for name in POSummaryOut.model_fields if include_items or name != "items"]
+    # SELECT เฉพาะคอลัมน์ที่แสดงแทนการโหลด PO ทั้งแถว (~55 คอลัมน์)
+    query = paginate(select_fields(PurchaseOrder, selected), PurchaseOrder.po_id, limit, cursor=cursor, skip=skip)
+    rows, next_cursor = split_page((await db.execute(query)).all(), PurchaseOrder.po_id, limit)
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    pos = [row._asdict() for row in rows]
+    if "items" in selected:
+        # โหลด items ของทั้งหน้าใน query เดียวแทนการ query ทีละ PO
+        items = await load_children(db, PurchaseOrderItem, PurchaseOrderItem.poid, [po["po_id"] for po in pos])
+        for po in pos:
+            po["items"] = items[po["po_id"]]
+    return pos
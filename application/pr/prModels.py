@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Date, Text, DateTime, Numeric, ForeignKey
+from sqlalchemy import Column, Integer, String, Date, Text, DateTime, Numeric, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.ext.declarative import declarative_base
 from datetime import datetime
@@ -59,6 +59,14 @@ class Pr(Base):
     # ความสัมพันธ์กับตาราง PrItem
     items = relationship("PrItem", back_populates="pr")
 
+    __table_args__ = (
+        Index('ix_pr_prno_compcode', 'pr_prno', 'compcode'),
+        # index สำหรับตัวกรองของรายการ PR (ทุกตัวกรองขึ้นต้นด้วย compcode)
+        Index('ix_pr_compcode_status_po_open', 'compcode', 'pr_status', 'po_open'),
+        Index('ix_pr_compcode_project', 'compcode', 'pr_project'),
+        Index('ix_pr_compcode_prdate', 'compcode', 'pr_prdate'),
+    )
+
 class PrItem(Base):
     __tablename__ = 'pr_item'
 
@@ -108,3 +116,8 @@ class PrItem(Base):
 
     # ความสัมพันธ์กับตาราง Pr
     pr = relationship("Pr", back_populates="items")
+
+    __table_args__ = (
+        Index('ix_pr_item_ref_compcode_status', 'pri_ref', 'compcode', 'pri_status'),
+        Index('ix_pr_item_prid', 'prid'),
+    )
@@ -1,23 +1,24 @@
-from fastapi import APIRouter, HTTPException, Depends
-from sqlalchemy.orm import Session
-from sqlalchemy import create_engine
-from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
-import os
-from dotenv import load_dotenv
+from fastapi import APIRouter, HTTPException, Depends, Response, Request, Query
+from sqlalchemy import select, insert, update, func, or_
+from sqlalchemy.orm import selectinload
+from sqlalchemy.ext.asyncio import AsyncSession
+from core.database import get_db, get_read_db
+from core.docnumber import next_pr_number
+from core.pagination import paginate, split_page, NEXT_CURSOR_HEADER
+from core.fields import parse_fields, select_fields, load_children
+from core.etag import make_etag, etag_matches, not_modified
 from .prModels import Pr, PrItem
+from setup.users.current_user import CurrentUser, get_current_user
 from pydantic import BaseModel
-from typing import List
+from typing import List, Literal
+import os
 from datetime import datetime, date
 
-# โหลด environment variables
-load_dotenv()
-
-# สร้าง SessionLocal class
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=create_engine(os.getenv("DATABASE_URL") or ""))
-
 router = APIRouter()
 
+# จำนวน PR สูงสุดต่อการอนุมัติหนึ่งครั้ง
+PR_APPROVE_MAX_IDS = int(os.getenv("PR_APPROVE_MAX_IDS", 5000))
+
 class PrItemBase(BaseModel):
     pri_id: int
     pri_ref: str
@@ -106,23 +107,47 @@ class PrBase(BaseModel):
     pr_postatus: str | None = None
     items: List[PrItemBase] = []
 
+class PrItemCreate(PrItemBase):
+    pri_id: int | None = None
+    pri_ref: str | None = None
+
 class PrCreate(PrBase):
     pass
 
-# Dependency
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+class PrNew(PrBase):
+    # ตอนสร้างไม่ต้องส่ง pr_prno มาก็ได้ ระบบจะออกเลขให้
+    pr_prno: str | None = None
+    items: List[PrItemCreate] = []
+
+# ยอดเงินต่อรายการต้องเท่ากับ จำนวน x ราคาต่อหน่วย (ยอมให้คลาดเคลื่อนจากการปัดเศษ)
+PR_ITEM_AMOUNT_TOLERANCE = 0.01
+
+def check_item_totals(items: List[PrItemCreate]):
+    errors = [
+        {"line": line, "pri_amount": item.pri_amount, "expected": round(item.pri_qty * item.pri_priceunit, 4)}
+        for line, item in enumerate(items, start=1)
+        if abs(item.pri_qty * item.pri_priceunit - item.pri_amount) > PR_ITEM_AMOUNT_TOLERANCE
+    ]
+    if errors:
+        raise HTTPException(status_code=400, detail={"message": "ยอดเงินรายการไม่ตรงกับ จำนวน x ราคาต่อหน่วย", "items": errors})
+
+async def get_pr(db: AsyncSession, pr_id: int):
+    # โหลด PR พร้อมรายการ items (AsyncSession ไม่รองรับ lazy load)
+    result = await db.execute(
+        select(Pr)
+        .options(selectinload(Pr.items))
+        .filter(Pr.pr_prid == pr_id)
+        .execution_options(populate_existing=True)
+    )
+    return result.scalars().first()
 
 # CRUD Operations
 @router.post("/pr/", response_model=PrBase)
-def create_pr(pr: PrCreate, db: Session = Depends(get_db)):
+async def create_pr(pr: PrNew, db: AsyncSession = Depends(get_db)):
+    check_item_totals(pr.items)
     try:
         db_pr = Pr(
-            pr_prno=pr.pr_prno,
+            pr_prno=pr.pr_prno or await next_pr_number(pr.compcode, pr.pr_prdate),
             pr_prdate=pr.pr_prdate,
             pr_memid=pr.pr_memid,
             pr_reqname=pr.pr_reqname,
@@ -149,53 +174,196 @@ def create_pr(pr: PrCreate, db: Session = Depends(get_db)):
             purchase_type=pr.purchase_type
         )
         db.add(db_pr)
-        db.commit()
-        db.refresh(db_pr)
-        return db_pr
+        await db.flush() # เพื่อให้ได้ pr_prid ก่อน insert items
+
+        # บันทึก items ทั้งหมดด้วย bulk insert ครั้งเดียวใน transaction เดียวกับ header
+        if pr.items:
+            item_columns = PrItem.__table__.columns
+            await db.execute(insert(PrItem), [
+                {
+                    **{key: value for key, value in item.model_dump(exclude={"pri_id"}).items() if key in item_columns},
+                    "pri_ref": db_pr.pr_prno,
+                    "compcode": pr.compcode,
+                    "pri_discountper3": item.pri_discountper3 or 0,
+                    "pri_discountper4": item.pri_discountper4 or 0,
+                    "prid": db_pr.pr_prid,
+                }
+                for item in pr.items
+            ])
+        await db.commit()
+        return await get_pr(db, db_pr.pr_prid)
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=400, detail=str(e))
 
-@router.get("/pr/{pr_id}", response_model=PrBase)
-def read_pr(pr_id: int, db: Session = Depends(get_db)):
-    db_pr = db.query(Pr).filter(Pr.pr_prid == pr_id).first()
+# field ที่ PrBase บังคับต้องมี จึงต้องอยู่ในผลลัพธ์เสมอเมื่อใช้ ?fields=
+PR_REQUIRED_FIELDS = ("pr_prid", "pr_prno", "pr_prdate")
+
+async def pr_rows_to_dicts(db: AsyncSession, rows, selected: list[str]) -> list[dict]:
+    # แถวจาก SELECT เฉพาะคอลัมน์ + items ของทุก PR ใน query เดียว (ถ้าขอ)
+    prs = [row._asdict() for row in rows]
+    if "items" in selected:
+        items = await load_children(db, PrItem, PrItem.prid, [pr["pr_prid"] for pr in prs])
+        for pr in prs:
+            pr["items"] = items[pr["pr_prid"]]
+    return prs
+
+# คอลัมน์ที่บอกเวอร์ชันของ PR (รวมสถานะอนุมัติ/เปิด PO ที่ถูกแก้จากที่อื่น) ใช้สร้าง ETag
+PR_VERSION_COLUMNS = [
+    Pr.usercreate, Pr.editdate, Pr.deldate, Pr.approve_date, Pr.reject_date,
+    Pr.pr_status, Pr.pr_approve, Pr.pe_approve, Pr.pm_approve, Pr.director_approve, Pr.po_open,
+    select(func.count(PrItem.pri_id)).where(PrItem.prid == Pr.pr_prid).scalar_subquery(),
+    select(func.max(PrItem.pri_id)).where(PrItem.prid == Pr.pr_prid).scalar_subquery(),
+]
+
+@router.get("/pr/{pr_id}", response_model=PrBase, response_model_exclude_unset=True)
+async def read_pr(pr_id: int, request: Request, response: Response, fields: str | None = None, db: AsyncSession = Depends(get_read_db)):
+    selected = parse_fields(fields, PrBase.model_fields, always=PR_REQUIRED_FIELDS)
+
+    # ตรวจเวอร์ชันก่อนโหลด PR พร้อม items ถ้าไม่เปลี่ยนตอบ 304
+    version = (await db.execute(select(*PR_VERSION_COLUMNS).filter(Pr.pr_prid == pr_id))).first()
+    if version is None:
+        raise HTTPException(status_code=404, detail="PR not found")
+    etag = make_etag("pr", pr_id, selected, *version)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    response.headers["ETag"] = etag
+
+    if selected is None:
+        db_pr = await get_pr(db, pr_id)
+    else:
+        row = (await db.execute(select_fields(Pr, selected).filter(Pr.pr_prid == pr_id))).first()
+        db_pr = (await pr_rows_to_dicts(db, [row], selected))[0] if row else None
     if db_pr is None:
         raise HTTPException(status_code=404, detail="PR not found")
     return db_pr
 
-@router.get("/prs/", response_model=List[PrBase])
-def read_prs(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    prs = db.query(Pr).offset(skip).limit(limit).all()
+@router.get("/prs/", response_model=List[PrBase], response_model_exclude_unset=True)
+async def read_prs(
+    response: Response,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1),
+    cursor: str | None = None,
+    fields: str | None = None,
+    compcode: str | None = None,
+    pr_project: str | None = None,
+    pr_status: str | None = None,
+    po_open: str | None = None,
+    date_from: date | None = Query(None, alias="from"),
+    date_to: date | None = Query(None, alias="to"),
+    include_items: bool = True,
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db),
+):
+    # composite index ของตัวกรองขึ้นต้นด้วย compcode (ดู prModels) ถ้ากรองโดยไม่ระบุ compcode
+    # ให้ใช้บริษัทของผู้ใช้ ไม่งั้นจะเป็น full scan ของตาราง pr
+    filtered = pr_project or pr_status or po_open or date_from or date_to
+    if filtered and not compcode:
+        compcode = current_user.compcode
+        if not compcode:
+            raise HTTPException(status_code=400, detail="กรุณาระบุ compcode เมื่อกรองรายการ PR")
+
+    # ถ้าระบุ fields จะได้ items เฉพาะเมื่อขอ "items" ใน fields
+    selected = parse_fields(fields, PrBase.model_fields, always=PR_REQUIRED_FIELDS)
+    if selected is None:
+        selected = [name for name in PrBase.model_fields if include_items or name != "items"]
+
+    # ตัวกรองทุกตัวมาพร้อม compcode เสมอ จึงใช้ composite index ได้ (ไม่มีตัวกรองเลยจะไล่ตาม primary key)
+    query = select_fields(Pr, selected)
+    if compcode:
+        query = query.filter(Pr.compcode == compcode)
+    if pr_project:
+        query = query.filter(Pr.pr_project == pr_project)
+    if pr_status:
+        query = query.filter(Pr.pr_status == pr_status)
+    if po_open:
+        query = query.filter(Pr.po_open == po_open)
+    if date_from:
+        query = query.filter(Pr.pr_prdate >= date_from)
+    if date_to:
+        query = query.filter(Pr.pr_prdate <= date_to)
+
+    query = paginate(query, Pr.pr_prid, limit, cursor=cursor, skip=skip)
+    rows, next_cursor = split_page((await db.execute(query)).all(), Pr.pr_prid, limit)
+    # items ของทั้งหน้าโหลดใน query เดียว
+    prs = await pr_rows_to_dicts(db, rows, selected)
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
     return prs
 
 @router.put("/pr/{pr_id}", response_model=PrBase)
-def update_pr(pr_id: int, pr: PrCreate, db: Session = Depends(get_db)):
-    db_pr = db.query(Pr).filter(Pr.pr_prid == pr_id).first()
+async def update_pr(pr_id: int, pr: PrCreate, db: AsyncSession = Depends(get_db)):
+    db_pr = await get_pr(db, pr_id)
     if db_pr is None:
         raise HTTPException(status_code=404, detail="PR not found")
     
-    for var, value in vars(pr).items():
+    # แก้เฉพาะ field ที่ส่งมา field ที่ไม่ได้ส่งคงค่าเดิมไว้
+    for var, value in pr.model_dump(exclude_unset=True).items():
         setattr(db_pr, var, value)
+    # editdate เป็นส่วนหนึ่งของ ETag ต้องเปลี่ยนทุกครั้งที่แก้ไข
+    db_pr.editdate = datetime.now()
     
     try:
-        db.commit()
-        db.refresh(db_pr)
-        return db_pr
+        await db.commit()
+        return await get_pr(db, pr_id)
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=400, detail=str(e))
 
 @router.delete("/pr/{pr_id}")
-def delete_pr(pr_id: int, db: Session = Depends(get_db)):
-    db_pr = db.query(Pr).filter(Pr.pr_prid == pr_id).first()
+async def delete_pr(pr_id: int, db: AsyncSession = Depends(get_db)):
+    db_pr = await get_pr(db, pr_id)
     if db_pr is None:
         raise HTTPException(status_code=404, detail="PR not found")
     
     try:
-        db.delete(db_pr)
-        db.commit()
+        await db.delete(db_pr)
+        await db.commit()
         return {"message": "PR deleted successfully"}
     except Exception as e:
-        db.rollback()
+        await db.rollback()
+        raise HTTPException(status_code=400, detail=str(e))
+
+class PrApprove(BaseModel):
+    pr_ids: List[int]
+    level: Literal["pr_approve", "pe_approve", "pm_approve", "director_approve"]
+
+@router.post("/approve", response_model=dict)
+async def approve_prs(body: PrApprove, current_user: CurrentUser = Depends(get_current_user), db: AsyncSession = Depends(get_db)):
+    """อนุมัติ PR หลายใบพร้อมกันด้วย UPDATE ครั้งเดียว บันทึกผู้อนุมัติในคอลัมน์ของระดับนั้นและ approve_date"""
+    pr_ids = list(dict.fromkeys(body.pr_ids))
+    if not pr_ids:
+        raise HTTPException(status_code=400, detail="กรุณาระบุ PR ที่จะอนุมัติ")
+    if len(pr_ids) > PR_APPROVE_MAX_IDS:
+        raise HTTPException(status_code=400, detail=f"อนุมัติได้สูงสุด {PR_APPROVE_MAX_IDS} รายการต่อครั้ง")
+
+    level = getattr(Pr, body.level)
+    approver = current_user.m_code or str(current_user.m_id)
+    try:
+        # ล็อกแถวที่เกี่ยวข้องก่อน เพื่อให้ผลราย id ตรงกับสิ่งที่ UPDATE จริง
+        current = dict((await db.execute(
+            select(Pr.pr_prid, level).filter(Pr.pr_prid.in_(pr_ids)).with_for_update()
+        )).all())
+        approvable = [pr_id for pr_id in pr_ids if pr_id in current and not current[pr_id]]
+        if approvable:
+            await db.execute(
+                update(Pr)
+                .where(Pr.pr_prid.in_(approvable), or_(level.is_(None), level == ''))
+                .values({level: approver, Pr.approve_date: date.today(), Pr.editdate: datetime.now()})
+                .execution_options(synchronize_session=False)
+            )
+        await db.commit()
+    except Exception as e:
+        await db.rollback()
         raise HTTPException(status_code=400, detail=str(e))
 
+    results = []
+    for pr_id in pr_ids:
+        if pr_id not in current:
+            status = "not_found"
+        elif current[pr_id]:
+            status = "already_approved"
+        else:
+            status = "approved"
+        results.append({"pr_prid": pr_id, "status": status})
+    return {"message": "อนุมัติ PR สำเร็จ", "level": body.level, "approved": len(approvable), "results": results}
@@ -0,0 +1,47 @@
+"""เวลาตรวจ token ต่อ request เมื่อมีและไม่มี cache (user-011: verified-token cache)
+
+    python -m benchmarks.bench_auth --calls 100000 --tokens 20
+"""
+import time
+import argparse
+
+from fastapi.security import HTTPAuthorizationCredentials
+
+from benchmarks.common import run
+from setup.users import auth
+
+
+def measure(credentials, calls: int) -> float:
+    start = time.perf_counter()
+    for i in range(calls):
+        auth.verify_token(credentials[i % len(credentials)])
+    return (time.perf_counter() - start) / calls
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--calls", type=int, default=100000)
+    parser.add_argument("--tokens", type=int, default=20, help="จำนวน token ที่ใช้สลับกัน (จำนวนผู้ใช้พร้อมกัน)")
+    args = parser.parse_args()
+
+    credentials = [
+        HTTPAuthorizationCredentials(scheme="Bearer", credentials=auth.create_access_token({"sub": f"u{i}", "user_id": i}))
+        for i in range(args.tokens)
+    ]
+    cache_size = auth.TOKEN_CACHE_SIZE
+    try:
+        auth.TOKEN_CACHE_SIZE = 0
+        auth._token_cache.clear()
+        uncached = measure(credentials, args.calls)
+        auth.TOKEN_CACHE_SIZE = cache_size or 10000
+        cached = measure(credentials, args.calls)
+    finally:
+        auth.TOKEN_CACHE_SIZE = cache_size
+        auth._token_cache.clear()
+
+    print(f"jwt.decode every call: {uncached * 1e6:.2f} us/request")
+    print(f"verified-token cache:  {cached * 1e6:.2f} us/request ({uncached / cached:.1f}x faster)")
+
+
+if __name__ == "__main__":
+    run(main)
@@ -0,0 +1,54 @@
+"""ขนาด payload และ CPU ของการบีบอัด response read_purchase_orders (user-020)
+
+    python -m benchmarks.bench_compression --pos 100 --items 20 --runs 20
+"""
+import gzip
+import time
+import argparse
+
+from benchmarks.common import api_client, create_po, run
+from core.compression import brotli
+
+ENCODINGS = [("gzip", level) for level in (1, 6, 9)]
+if brotli is not None:
+    ENCODINGS += [("br", quality) for quality in (1, 4, 11)]
+
+
+def compress(body: bytes, encoding: str, level: int) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=level)
+    return gzip.compress(body, compresslevel=level)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pos", type=int, default=100)
+    parser.add_argument("--items", type=int, default=20)
+    parser.add_argument("--runs", type=int, default=20)
+    args = parser.parse_args()
+
+    async with api_client() as client:
+        for _ in range(args.pos):
+            await create_po(client, "BENCH020", args.items)
+        response = await client.get("/api/v1/purchase_order/", params={"limit": args.pos},
+                                    headers={"Accept-Encoding": "identity"})
+        response.raise_for_status()
+        body = response.content
+        # ผ่าน middleware จริงด้วย Accept-Encoding ของ browser
+        served = await client.get("/api/v1/purchase_order/", params={"limit": args.pos},
+                                  headers={"Accept-Encoding": "gzip, deflate, br"})
+
+    print(f"identity            {len(body) / 1024:8.1f} KiB")
+    for encoding, level in ENCODINGS:
+        start = time.process_time()
+        for _ in range(args.runs):
+            compressed = compress(body, encoding, level)
+        cpu_ms = (time.process_time() - start) * 1000 / args.runs
+        print(f"{encoding:4s} level {level:2d}       {len(compressed) / 1024:8.1f} KiB  "
+              f"ratio {len(body) / len(compressed):5.1f}x  cpu {cpu_ms:7.2f} ms/response")
+    print(f"middleware default: Content-Encoding={served.headers.get('content-encoding')} "
+          f"wire size {int(served.headers.get('content-length', len(served.content))) / 1024:.1f} KiB")
+
+
+if __name__ == "__main__":
+    run(main)
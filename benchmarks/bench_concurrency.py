@@ -0,0 +1,56 @@
+"""latency ภายใต้โหลดผสม (user-002: async data layer)
+
+request หนัก (PO list พร้อม items) ยิงพร้อมกับ request เบา (PO detail, /health)
+ถ้า DB call บล็อก event loop request เบาจะรอ request หนักและ p99 จะพุ่ง
+
+    python -m benchmarks.bench_concurrency --pos 200 --items 20 --concurrency 50 --requests 3000
+    BENCH_URL=http://localhost:8888 BENCH_TOKEN=... python -m benchmarks.bench_concurrency   # server จริง / commit เก่า
+"""
+import random
+import argparse
+import asyncio
+from collections import defaultdict
+
+from benchmarks.common import api_client, create_po, summarize, timed, run
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pos", type=int, default=200)
+    parser.add_argument("--items", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--requests", type=int, default=3000)
+    parser.add_argument("--heavy-ratio", type=float, default=0.2)
+    args = parser.parse_args()
+
+    async with api_client() as client:
+        po_ids = [(await create_po(client, "BENCH002", args.items))["po_id"] for _ in range(args.pos)]
+
+        routes = {
+            "heavy  GET /purchase_order/?limit=100": lambda: client.get("/api/v1/purchase_order/", params={"limit": 100}),
+            "light  GET /purchase_order/{id}": lambda: client.get(f"/api/v1/purchase_order/{random.choice(po_ids)}"),
+            "light  GET /health": lambda: client.get("/api/v1/health"),
+        }
+        names = list(routes)
+        weights = [args.heavy_ratio, (1 - args.heavy_ratio) * 0.75, (1 - args.heavy_ratio) * 0.25]
+        plan = random.choices(names, weights=weights, k=args.requests)
+
+        samples = defaultdict(list)
+        slots = asyncio.Semaphore(args.concurrency)
+
+        async def send(name):
+            async with slots:
+                response, elapsed = await timed(routes[name]())
+                response.raise_for_status()
+                samples[name].append(elapsed)
+
+        _, total = await timed(asyncio.gather(*(send(name) for name in plan)))
+
+    print(f"{args.requests} requests, concurrency {args.concurrency}, {args.requests / total:.0f} req/s")
+    for name in names:
+        print(f"{name:40s} {summarize(samples[name])}")
+    print(f"{'all':40s} {summarize([s for values in samples.values() for s in values])}")
+
+
+if __name__ == "__main__":
+    run(main)
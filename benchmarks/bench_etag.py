@@ -0,0 +1,46 @@
+"""bandwidth และ latency ของการ poll หน้ารายละเอียดที่ไม่เปลี่ยน ด้วยและไม่ด้วย If-None-Match (user-021)
+
+    python -m benchmarks.bench_etag --polls 500 --items 50
+"""
+import argparse
+
+from benchmarks.common import api_client, create_po, create_pr, summarize, timed, run
+
+
+async def poll(client, url: str, polls: int, conditional: bool) -> tuple[list[float], int, dict]:
+    etag = (await client.get(url)).headers["etag"]
+    headers = {"If-None-Match": etag} if conditional else {}
+    samples, wire_bytes, statuses = [], 0, {}
+    for _ in range(polls):
+        response, elapsed = await timed(client.get(url, headers=headers))
+        samples.append(elapsed)
+        wire_bytes += len(response.content)
+        statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+    return samples, wire_bytes, statuses
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--polls", type=int, default=500)
+    parser.add_argument("--items", type=int, default=50)
+    args = parser.parse_args()
+
+    async with api_client() as client:
+        po = await create_po(client, "BENCH021", args.items)
+        pr = await create_pr(client, "BENCH021", args.items)
+        company = (await client.post("/api/v1/company/", json={"company_name": "Bench Co", "compcode": "BENCH021"})).json()
+        urls = {
+            "PO detail": f"/api/v1/purchase_order/{po['po_id']}",
+            "PR detail": f"/api/v1/purchase_requisition/pr/{pr['pr_prid']}",
+            "company detail": f"/api/v1/company/{company['company_id']}",
+        }
+        for name, url in urls.items():
+            for conditional in (False, True):
+                samples, wire_bytes, statuses = await poll(client, url, args.polls, conditional)
+                mode = "If-None-Match" if conditional else "full GET"
+                print(f"{name:15s} {mode:14s} body {wire_bytes / args.polls:9.0f} B/poll  "
+                      f"statuses={statuses}  {summarize(samples)}")
+
+
+if __name__ == "__main__":
+    run(main)
@@ -0,0 +1,69 @@
+"""CPU ของ bcrypt ระหว่าง credential stuffing เมื่อมีและไม่มี login throttling (user-013)
+
+ยิง login รหัสผิดพร้อมกันหลายบัญชีจาก IP เดียว แล้ววัด CPU time ของโปรเซส จำนวนครั้งที่ใช้ bcrypt และจำนวน 429
+
+    python -m benchmarks.bench_login_burst --attempts 400 --accounts 20 --concurrency 50
+"""
+import time
+import asyncio
+import argparse
+from collections import Counter
+
+from benchmarks.common import api_client, BENCH_USER, run
+from core.ratelimit import MemoryBackend
+import core.ratelimit
+from setup.users.login import login_account_limiter, login_ip_limiter
+from setup.users.passwords import password_hasher
+
+
+async def attack(client, attempts: int, accounts: int, concurrency: int) -> dict:
+    # bucket ใหม่ทุกรอบ ผลของรอบก่อนไม่ค้าง
+    core.ratelimit.backend = MemoryBackend()
+    slots = asyncio.Semaphore(concurrency)
+    statuses = Counter()
+
+    async def attempt(i):
+        async with slots:
+            body = {"email": f"victim{i % accounts}@example.com" if i % accounts else BENCH_USER["m_email"], "password": "wrong"}
+            statuses[(await client.post("/api/v1/login/login", json=body)).status_code] += 1
+
+    hashed_before = password_hasher.completed
+    cpu, wall = time.process_time(), time.perf_counter()
+    await asyncio.gather(*(attempt(i) for i in range(attempts)))
+    return {
+        "cpu_s": time.process_time() - cpu,
+        "wall_s": time.perf_counter() - wall,
+        "bcrypt_calls": password_hasher.completed - hashed_before,
+        "statuses": dict(sorted(statuses.items())),
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--attempts", type=int, default=400)
+    parser.add_argument("--accounts", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=50)
+    args = parser.parse_args()
+
+    async with api_client() as client:
+        # บัญชีเหยื่อต้องมีอยู่จริง ไม่งั้นตอบ 404 โดยไม่ถึง bcrypt
+        for i in range(1, args.accounts):
+            await client.post("/api/v1/users/", json=dict(BENCH_USER, m_email=f"victim{i}@example.com"))
+
+        limits = [(limiter, limiter.capacity) for limiter in (login_account_limiter, login_ip_limiter)]
+        try:
+            for limiter, _ in limits:
+                limiter.capacity = 10 ** 9
+            unthrottled = await attack(client, args.attempts, args.accounts, args.concurrency)
+        finally:
+            for limiter, capacity in limits:
+                limiter.capacity = capacity
+        throttled = await attack(client, args.attempts, args.accounts, args.concurrency)
+
+    for name, result in (("no throttling", unthrottled), ("throttled", throttled)):
+        print(f"{name:14s} cpu={result['cpu_s']:.2f}s wall={result['wall_s']:.2f}s "
+              f"bcrypt={result['bcrypt_calls']} statuses={result['statuses']}")
+
+
+if __name__ == "__main__":
+    run(main)
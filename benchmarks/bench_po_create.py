@@ -0,0 +1,33 @@
+"""round trip และ latency ของการสร้าง PO ขนาดต่าง ๆ (user-006: bulk insert รายการ PO)
+
+    python -m benchmarks.bench_po_create --sizes 10 100 1000 --runs 5
+"""
+import argparse
+
+from benchmarks.common import BENCH_URL, api_client, create_pr, po_payload, count_statements, summarize, timed, run
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    async with api_client() as client:
+        for size in args.sizes:
+            samples = []
+            statements = None
+            for _ in range(args.runs):
+                body = po_payload(await create_pr(client, "BENCH006", size))
+                with count_statements() as executed:
+                    response, elapsed = await timed(client.post("/api/v1/purchase_order/", json=body))
+                response.raise_for_status()
+                samples.append(elapsed)
+                statements = len(executed)
+            # นับ statement ได้เฉพาะเมื่อแอปรันในโปรเซสนี้
+            round_trips = "-" if BENCH_URL else statements
+            print(f"{size:5d} items  round trips={round_trips}  {summarize(samples)}")
+
+
+if __name__ == "__main__":
+    run(main)
@@ -0,0 +1,53 @@
+"""อนุมัติ PR 1,000 ใบ: POST /approve ครั้งเดียว เทียบกับ PUT ทีละใบ (user-024)
+
+    python -m benchmarks.bench_pr_approve --prs 1000
+"""
+import argparse
+from datetime import date
+
+from sqlalchemy import insert, select
+
+from benchmarks.common import api_client, count_statements, timed, run
+from core.database import SessionLocal
+from application.pr.prModels import Pr
+
+
+async def seed(compcode: str, count: int) -> list[dict]:
+    async with SessionLocal() as db:
+        await db.execute(insert(Pr), [
+            dict(pr_prno=f"{compcode}-{i:06d}", pr_prdate=date(2024, 1, 1), compcode=compcode) for i in range(count)
+        ])
+        await db.commit()
+        rows = await db.execute(select(Pr.pr_prid, Pr.pr_prno, Pr.pr_prdate).filter(Pr.compcode == compcode))
+        return [dict(pr_prid=pr_id, pr_prno=prno, pr_prdate=prdate.isoformat()) for pr_id, prno, prdate in rows]
+
+
+async def put_each(client, prs):
+    # แบบเดิม: PUT ทั้งใบทีละ PR
+    for pr in prs:
+        response = await client.put(f"/api/v1/purchase_requisition/pr/{pr['pr_prid']}", json=dict(pr, pr_approve="BENCH"))
+        response.raise_for_status()
+
+
+async def approve_all(client, prs):
+    response = await client.post("/api/v1/purchase_requisition/approve",
+                                 json={"pr_ids": [pr["pr_prid"] for pr in prs], "level": "pr_approve"})
+    response.raise_for_status()
+    assert response.json()["approved"] == len(prs)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--prs", type=int, default=1000)
+    args = parser.parse_args()
+
+    async with api_client() as client:
+        for name, compcode, approve in (("PUT per PR", "BENCH024A", put_each), ("POST /approve", "BENCH024B", approve_all)):
+            prs = await seed(compcode, args.prs)
+            with count_statements() as executed:
+                _, elapsed = await timed(approve(client, prs))
+            print(f"{name:14s} {args.prs} PRs  {elapsed * 1000:9.1f} ms  round trips={len(executed)}")
+
+
+if __name__ == "__main__":
+    run(main)
@@ -0,0 +1,50 @@
+"""สร้าง PR 500 รายการ: header + items ใน request เดียว เทียบกับทีละรายการ (user-022)
+
+แบบเดิมจำลองโดยสร้าง header แล้วบันทึก PrItem ทีละรายการ รายการละหนึ่ง transaction
+(เหมือน client ที่ส่งทีละ item) รันในโปรเซสเดียวกับแอปเท่านั้น
+
+    python -m benchmarks.bench_pr_create --items 500 --runs 3
+"""
+import argparse
+
+from benchmarks.common import api_client, pr_payload, count_statements, summarize, timed, run
+from core.database import SessionLocal
+from application.pr.prModels import PrItem
+
+
+async def one_item_per_request(client, item_count: int):
+    body = pr_payload("BENCH022", item_count)
+    items = body.pop("items")
+    response = await client.post("/api/v1/purchase_requisition/pr/", json=body)
+    response.raise_for_status()
+    pr = response.json()
+    for item in items:
+        async with SessionLocal() as db:
+            db.add(PrItem(**item, pri_ref=pr["pr_prno"], compcode=pr["compcode"], prid=pr["pr_prid"],
+                          pri_discountper3=0, pri_discountper4=0))
+            await db.commit()
+
+
+async def single_request(client, item_count: int):
+    response = await client.post("/api/v1/purchase_requisition/pr/", json=pr_payload("BENCH022", item_count))
+    response.raise_for_status()
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--items", type=int, default=500)
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    async with api_client() as client:
+        for name, create in (("one item per request", one_item_per_request), ("header + items at once", single_request)):
+            samples = []
+            for _ in range(args.runs):
+                with count_statements() as executed:
+                    _, elapsed = await timed(create(client, args.items))
+                samples.append(elapsed)
+            print(f"{name:24s} round trips={len(executed):5d}  {summarize(samples)}")
+
+
+if __name__ == "__main__":
+    run(main)
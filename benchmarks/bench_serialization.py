@@ -0,0 +1,91 @@
+"""serialize PO 1,000 ใบพร้อม items: dict ที่สร้างเอง + jsonable_encoder + json (เดิม)
+เทียบกับ response model + orjson (ปัจจุบัน) (user-017)
+
+รันในโปรเซสเดียวกับแอปเท่านั้น (วัดเฉพาะขั้น serialize ไม่รวม query)
+
+    python -m benchmarks.bench_serialization --pos 1000 --items 10 --runs 5
+"""
+import json
+import time
+import argparse
+from datetime import date
+from typing import List
+
+import orjson
+from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter
+from sqlalchemy import insert, select
+
+from benchmarks.common import create_schema, summarize, run
+from core.database import SessionLocal
+from core.fields import load_children
+from application.po.models import PurchaseOrder, PurchaseOrderItem
+from application.po.purchase_order import POSummaryOut, POItemOut
+
+PO_FIELDS = [name for name in POSummaryOut.model_fields if name != "items"]
+ITEM_FIELDS = list(POItemOut.model_fields)
+
+
+async def seed(po_count: int, item_count: int):
+    async with SessionLocal() as db:
+        await db.execute(insert(PurchaseOrder), [
+            dict(po_pono=f"BENCH-{i:06d}", po_podate=date(2024, 1, 1), po_project="P1", po_vender="vendor ",
+                 po_venderid=1, compcode="BENCH017")
+            for i in range(po_count)
+        ])
+        po_ids = (await db.execute(
+            select(PurchaseOrder.po_id).filter(PurchaseOrder.compcode == "BENCH017").order_by(PurchaseOrder.po_id)
+        )).scalars().all()
+        await db.execute(insert(PurchaseOrderItem), [
+            dict(poid=po_id, poi_matname=f"material {line}", poi_matcode=f"M{line:05d}", poi_qty=2, poi_unit="pcs",
+                 poi_priceunit=1.5, poi_amount=3.0, poi_vatper=7, compcode="BENCH017")
+            for po_id in po_ids for line in range(item_count)
+        ])
+        await db.commit()
+        pos = (await db.execute(
+            select(PurchaseOrder).filter(PurchaseOrder.compcode == "BENCH017").order_by(PurchaseOrder.po_id)
+        )).scalars().all()
+        items = await load_children(db, PurchaseOrderItem, PurchaseOrderItem.poid, po_ids)
+    return pos, items
+
+
+def legacy_path(pos, items) -> bytes:
+    # แบบเดิม: dict ทีละ field แล้ว JSONResponse (jsonable_encoder + json.dumps)
+    data = [
+        {**{name: getattr(po, name) for name in PO_FIELDS},
+         "items": [{name: getattr(item, name) for name in ITEM_FIELDS} for item in items[po.po_id]]}
+        for po in pos
+    ]
+    return json.dumps(jsonable_encoder(data), ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+adapter = TypeAdapter(List[POSummaryOut])
+
+
+def response_model_path(pos, items) -> bytes:
+    # แบบปัจจุบัน: dict ของคอลัมน์ที่เลือก -> ตรวจด้วย response model -> ORJSONResponse
+    data = [{**{name: getattr(po, name) for name in PO_FIELDS}, "items": items[po.po_id]} for po in pos]
+    validated = adapter.validate_python(data)
+    return orjson.dumps(adapter.dump_python(validated, mode="json", exclude_unset=True))
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pos", type=int, default=1000)
+    parser.add_argument("--items", type=int, default=10)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    await create_schema()
+    pos, items = await seed(args.pos, args.items)
+    for name, serialize in (("dict + jsonable_encoder + json", legacy_path), ("response model + orjson", response_model_path)):
+        samples = []
+        for _ in range(args.runs):
+            start = time.perf_counter()
+            body = serialize(pos, items)
+            samples.append(time.perf_counter() - start)
+        print(f"{name:32s} {len(body) / 1024:8.0f} KiB  {summarize(samples)}")
+
+
+if __name__ == "__main__":
+    run(main)
@@ -0,0 +1,137 @@
+"""ตัวช่วยร่วมของ benchmark
+
+ค่าเริ่มต้นรันแอปในโปรเซสเดียวกันบน SQLite ไฟล์ชั่วคราว (ไม่ต้องมี MySQL)
+ตั้ง DATABASE_URL เพื่อใช้ฐานข้อมูลจริง หรือ BENCH_URL + BENCH_TOKEN เพื่อยิงไปที่ server ที่รันอยู่
+(ใช้เทียบก่อน/หลังได้โดยรัน server จาก commit เก่าแล้วรันสคริปต์เดิมซ้ำ)
+"""
+import os
+import time
+import asyncio
+import tempfile
+import statistics
+from contextlib import asynccontextmanager, contextmanager
+
+import httpx
+
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{tempfile.mkdtemp(prefix='workflow-bench-')}/bench.db")
+os.environ.setdefault("SECRET_KEY", "benchmark-secret-key-not-for-production")
+
+BENCH_URL = os.getenv("BENCH_URL")
+BENCH_TOKEN = os.getenv("BENCH_TOKEN")
+BENCH_USER = dict(m_code="BENCH", m_firstname="bench", m_lastname="user", m_user="bench", m_position="p",
+                  m_department="d", uimg="x", m_pass="bench", m_email="bench@example.com")
+
+
+async def create_schema():
+    """สร้างตารางทั้งหมดเมื่อใช้ SQLite (ฐานข้อมูลจริงใช้ python -m core.migrations)"""
+    from core.database import engine
+    if engine.dialect.name != "sqlite":
+        return
+    from application.po.models import Base as POBase
+    from application.pr.prModels import Base as PRBase
+    from setup.company.models import Base as CompanyBase
+    from setup.project.models import Base as ProjectBase
+    from setup.users.models import Base as UserBase
+    from core.models import Base as CoreBase
+    # server_default แบบ ON UPDATE ใช้ได้เฉพาะ MySQL
+    for table in UserBase.metadata.tables.values():
+        for column in table.columns:
+            if column.server_default is not None and "ON UPDATE" in str(getattr(column.server_default, "arg", "")):
+                column.server_default = None
+    async with engine.begin() as conn:
+        for base in (POBase, PRBase, CompanyBase, ProjectBase, UserBase, CoreBase):
+            await conn.run_sync(base.metadata.create_all)
+
+
+@asynccontextmanager
+async def api_client():
+    """httpx.AsyncClient ที่ login แล้ว (ASGI ในโปรเซส หรือ BENCH_URL)"""
+    if BENCH_URL:
+        headers = {"Authorization": f"Bearer {BENCH_TOKEN}"}
+        async with httpx.AsyncClient(base_url=BENCH_URL, headers=headers, timeout=120) as client:
+            yield client
+        return
+
+    import main
+    from setup.users.auth import create_access_token
+    await create_schema()
+    headers = {"Authorization": "Bearer " + create_access_token({"sub": BENCH_USER["m_email"], "user_id": 1})}
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", headers=headers, timeout=120) as client:
+        # ผู้ใช้ m_id=1 สำหรับ endpoint ที่ใช้ get_current_user (มีอยู่แล้วก็ไม่เป็นไร)
+        await client.post("/api/v1/users/", json=BENCH_USER)
+        yield client
+
+
+def pr_item(line: int) -> dict:
+    return dict(pri_matname=f"material {line}", pri_matcode=f"M{line:05d}", pri_qty=2, pri_unit="pcs",
+                pri_priceunit=1.5, pri_amount=3.0)
+
+
+def pr_payload(compcode: str, item_count: int) -> dict:
+    return dict(pr_prid=0, pr_prdate="2024-01-01", compcode=compcode, pr_project="P1",
+                items=[pr_item(line) for line in range(item_count)])
+
+
+def po_payload(pr: dict) -> dict:
+    """PO ที่เปิดจากทุกรายการของ PR (create_purchase_order ต้องมี PR ที่อ้างถึง)"""
+    items = [
+        dict(poi_matname=item["pri_matname"], poi_matcode=item["pri_matcode"], poi_qty=item["pri_qty"],
+             poi_unit=item["pri_unit"], poi_priceunit=item["pri_priceunit"], poi_amount=item["pri_amount"],
+             poi_vatper=7, poid=0, compcode=pr["compcode"], pri_id=item.get("pri_id"))
+        for item in pr["items"]
+    ]
+    return dict(po_podate="2024-01-02", po_project="P1", po_department="D", po_memid="1", po_venderid=1,
+                po_vender="vendor", po_prno=pr["pr_prno"], compcode=pr["compcode"], items=items)
+
+
+async def create_pr(client: httpx.AsyncClient, compcode: str, item_count: int) -> dict:
+    response = await client.post("/api/v1/purchase_requisition/pr/", json=pr_payload(compcode, item_count))
+    response.raise_for_status()
+    return response.json()
+
+
+async def create_po(client: httpx.AsyncClient, compcode: str, item_count: int) -> dict:
+    pr = await create_pr(client, compcode, item_count)
+    response = await client.post("/api/v1/purchase_order/", json=po_payload(pr))
+    response.raise_for_status()
+    return response.json()
+
+
+@contextmanager
+def count_statements():
+    """นับ SQL statement (round trip) ที่ส่งไปฐานข้อมูลในโปรเซสนี้ คืน list ที่เพิ่มค่าระหว่างใช้งาน"""
+    from sqlalchemy import event
+    from core.database import engine
+    statements = []
+
+    def on_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine.sync_engine, "before_cursor_execute", on_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", on_execute)
+
+
+def percentile(samples, pct: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def summarize(samples) -> str:
+    """สรุปเวลา (วินาที) เป็น ms"""
+    ms = [sample * 1000 for sample in samples]
+    return (f"n={len(ms)} mean={statistics.fmean(ms):.2f}ms p50={percentile(ms, 50):.2f}ms "
+            f"p95={percentile(ms, 95):.2f}ms p99={percentile(ms, 99):.2f}ms")
+
+
+async def timed(awaitable):
+    start = time.perf_counter()
+    result = await awaitable
+    return result, time.perf_counter() - start
+
+
+def run(main):
+    asyncio.run(main())
@@ -0,0 +1,145 @@
+import os
+import json
+import time
+from collections import OrderedDict
+from dotenv import load_dotenv
+
+# โหลด environment variables
+load_dotenv()
+
+# memory = เก็บใน process (ค่าเริ่มต้น), redis = ใช้ร่วมกันทุก worker
+CACHE_BACKEND = os.getenv("CACHE_BACKEND", "memory")
+CACHE_REDIS_URL = os.getenv("CACHE_REDIS_URL", "redis://localhost:6379/0")
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", 1024))
+MASTER_DATA_CACHE_TTL = int(os.getenv("MASTER_DATA_CACHE_TTL", 300))
+
+
+class MemoryBackend:
+    """เก็บค่าใน process ด้วย TTL ต่อ entry และไล่ entry ที่ใช้น้อยที่สุดออกเมื่อเต็ม (LRU)"""
+
+    def __init__(self, max_entries: int = CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._data: OrderedDict[str, tuple[float, object]] = OrderedDict()
+
+    async def get(self, key: str):
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._data[key]
+            return None
+        self._data.move_to_end(key)
+        return value
+
+    async def set(self, key: str, value, ttl: int):
+        self._data[key] = (time.monotonic() + ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_entries:
+            self._data.popitem(last=False)
+
+    async def delete(self, *keys: str):
+        for key in keys:
+            self._data.pop(key, None)
+
+    async def delete_prefix(self, prefix: str):
+        for key in [k for k in self._data if k.startswith(prefix)]:
+            del self._data[key]
+
+    def size(self) -> int:
+        return len(self._data)
+
+
+class RedisBackend:
+    """เก็บค่าใน Redis เพื่อให้ทุก worker เห็นข้อมูลและการ invalidate เดียวกัน"""
+
+    def __init__(self, url: str = CACHE_REDIS_URL):
+        try:
+            import redis.asyncio as redis
+        except ImportError:
+            raise ValueError("CACHE_BACKEND=redis requires the redis package (pip install redis).")
+        self._redis = redis.from_url(url)
+
+    async def get(self, key: str):
+        raw = await self._redis.get(key)
+        return None if raw is None else json.loads(raw)
+
+    async def set(self, key: str, value, ttl: int):
+        await self._redis.set(key, json.dumps(value), ex=ttl)
+
+    async def delete(self, *keys: str):
+        if keys:
+            await self._redis.delete(*keys)
+
+    async def delete_prefix(self, prefix: str):
+        keys = [key async for key in self._redis.scan_iter(match=f"{prefix}*")]
+        if keys:
+            await self._redis.delete(*keys)
+
+    def size(self) -> int | None:
+        return None
+
+
+def create_backend():
+    if CACHE_BACKEND == "redis":
+        return RedisBackend()
+    if CACHE_BACKEND == "memory":
+        return MemoryBackend()
+    raise ValueError(f"Unknown CACHE_BACKEND: {CACHE_BACKEND}")
+
+
+backend = create_backend()
+# cache ทั้งหมดที่สร้างไว้ ใช้สำหรับแสดงสถิติ
+caches: dict[str, "TTLCache"] = {}
+
+
+class TTLCache:
+    """cache แยกตาม namespace ค่าที่เก็บต้องแปลงเป็น JSON ได้ (ใช้ jsonable_encoder ก่อน set)"""
+
+    def __init__(self, namespace: str, ttl: int = MASTER_DATA_CACHE_TTL):
+        self.namespace = namespace
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        caches[namespace] = self
+
+    def _key(self, key) -> str:
+        return f"{self.namespace}:{key}"
+
+    async def get(self, key):
+        value = await backend.get(self._key(key))
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    async def set(self, key, value):
+        await backend.set(self._key(key), value, self.ttl)
+
+    async def invalidate(self, *keys):
+        self.invalidations += 1
+        await backend.delete(*[self._key(key) for key in keys])
+
+    async def invalidate_prefix(self, prefix: str = ""):
+        self.invalidations += 1
+        await backend.delete_prefix(self._key(prefix))
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / total, 4) if total else 0.0,
+            "invalidations": self.invalidations,
+            "ttl": self.ttl,
+        }
+
+
+def cache_stats() -> dict:
+    return {
+        "backend": CACHE_BACKEND,
+        "entries": backend.size(),
+        "caches": {namespace: cache.stats() for namespace, cache in caches.items()},
+    }
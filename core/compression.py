@@ -0,0 +1,104 @@
+import os
+import gzip
+from dotenv import load_dotenv
+from starlette.datastructures import Headers, MutableHeaders
+
+try:
+    import brotli
+except ImportError:  # ไม่มี brotli ก็ใช้ gzip อย่างเดียว
+    brotli = None
+
+# โหลด environment variables
+load_dotenv()
+
+# response ที่เล็กกว่านี้ (bytes) ไม่บีบอัด เพราะไม่คุ้ม CPU
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", 1024))
+# gzip 1-9, brotli 0-11 (ระดับกลาง ๆ ได้ขนาดใกล้ระดับสูงสุดแต่ใช้ CPU น้อยกว่ามาก)
+COMPRESSION_GZIP_LEVEL = int(os.getenv("COMPRESSION_GZIP_LEVEL", 6))
+COMPRESSION_BROTLI_QUALITY = int(os.getenv("COMPRESSION_BROTLI_QUALITY", 4))
+COMPRESSION_BROTLI_ENABLED = os.getenv("COMPRESSION_BROTLI_ENABLED", "true").lower() == "true"
+
+
+def choose_encoding(accept_encoding: str) -> str | None:
+    """เลือก br หรือ gzip จาก Accept-Encoding (ข้ามตัวที่ q=0)"""
+    accepted = set()
+    for part in accept_encoding.lower().split(","):
+        name, _, params = part.partition(";")
+        params = params.replace(" ", "")
+        try:
+            q = float(params[2:]) if params.startswith("q=") else 1.0
+        except ValueError:
+            q = 0.0
+        if q > 0:
+            accepted.add(name.strip())
+    if brotli is not None and COMPRESSION_BROTLI_ENABLED and "br" in accepted:
+        return "br"
+    if "gzip" in accepted or "*" in accepted:
+        return "gzip"
+    return None
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=COMPRESSION_BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=COMPRESSION_GZIP_LEVEL)
+
+
+class CompressionMiddleware:
+    """บีบอัด response ทั้งก้อนด้วย br/gzip
+    ข้าม response ที่เล็กกว่า minimum_size, มี Content-Encoding อยู่แล้ว หรือเป็น streaming (มี body หลายส่วน)"""
+
+    def __init__(self, app, minimum_size: int = COMPRESSION_MIN_SIZE):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = choose_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message = None
+        passthrough = False
+
+        async def send_wrapper(message):
+            nonlocal start_message, passthrough
+            if passthrough:
+                await send(message)
+                return
+            if message["type"] == "http.response.start":
+                if "content-encoding" in Headers(raw=message["headers"]):
+                    passthrough = True
+                    await send(message)
+                else:
+                    # รอดู body ก้อนแรกก่อนตัดสินใจ
+                    start_message = message
+                return
+            if message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            if message.get("more_body", False) or len(body) < self.minimum_size:
+                # streaming response หรือเล็กเกินไป ส่งต่อโดยไม่บีบอัด
+                passthrough = True
+                await send(start_message)
+                await send(message)
+                return
+
+            compressed = compress(body, encoding)
+            headers = MutableHeaders(raw=start_message["headers"])
+            headers["Content-Encoding"] = encoding
+            headers["Content-Length"] = str(len(compressed))
+            # body ที่บีบอัดไม่ได้เหมือนกันทุก byte กับต้นฉบับ ETag จึงต้องเป็น weak (RFC 9110)
+            etag = headers.get("etag")
+            if etag and not etag.startswith("W/"):
+                headers["ETag"] = "W/" + etag
+            headers.add_vary_header("Accept-Encoding")
+            await send(start_message)
+            await send({"type": "http.response.body", "body": compressed})
+
+        await self.app(scope, receive, send_wrapper)
@@ -0,0 +1,207 @@
+import os
+import time
+import hashlib
+import logging
+import itertools
+from collections import OrderedDict
+from dotenv import load_dotenv
+from fastapi import Request
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+# โหลด environment variables
+load_dotenv()
+
+DATABASE_URL = os.getenv("DATABASE_URL")
+if not DATABASE_URL:
+    raise ValueError("DATABASE_URL is not set in the environment variables.")
+
+# ค่าตั้งของ connection pool (อ่านจาก environment)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 5))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", 10))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes")
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", 1800))
+DB_POOL_TIMEOUT = int(os.getenv("DB_POOL_TIMEOUT", 30))
+
+# read replica (คั่นด้วย comma) ถ้าไม่ตั้งค่า ทุก query จะไปที่ primary
+DATABASE_REPLICA_URLS = [url.strip() for url in os.getenv("DATABASE_REPLICA_URLS", "").split(",") if url.strip()]
+# ช่วงเวลาหลังจาก client เขียนข้อมูลที่ให้อ่านจาก primary (read-your-writes)
+DB_REPLICA_STICKY_SECONDS = float(os.getenv("DB_REPLICA_STICKY_SECONDS", 5))
+# เวลาที่งดใช้ replica ที่เชื่อมต่อไม่ได้ก่อนลองใหม่
+DB_REPLICA_RETRY_SECONDS = float(os.getenv("DB_REPLICA_RETRY_SECONDS", 30))
+DB_REPLICA_STICKY_MAX_CLIENTS = 10000
+
+logger = logging.getLogger(__name__)
+
+# driver แบบ async สำหรับแต่ละฐานข้อมูล
+ASYNC_DRIVERS = {
+    "mysql": "mysql+aiomysql",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+
+def to_async_url(url: str):
+    """แปลง DATABASE_URL (เช่น mysql+pymysql://) ให้ใช้ driver แบบ async"""
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+    if backend in ASYNC_DRIVERS and parsed.drivername != ASYNC_DRIVERS[backend]:
+        parsed = parsed.set(drivername=ASYNC_DRIVERS[backend])
+    return parsed
+
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    """AsyncAdaptedQueuePool ที่เก็บสถิติเวลารอ connection เพื่อใช้ปรับขนาด pool"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._checkouts = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+        self._checkout_errors = 0
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except Exception:
+            self._checkout_errors += 1
+            raise
+        finally:
+            waited = time.perf_counter() - start
+            self._checkouts += 1
+            self._wait_total += waited
+            self._wait_max = max(self._wait_max, waited)
+
+    def stats(self) -> dict:
+        checkouts = self._checkouts
+        return {
+            "pool_size": self.size(),
+            "checked_in": self.checkedin(),
+            "checked_out": self.checkedout(),
+            "overflow": self.overflow(),
+            "max_overflow": self._max_overflow,
+            "checkouts": checkouts,
+            "checkout_errors": self._checkout_errors,
+            "wait_time_total_ms": round(self._wait_total * 1000, 3),
+            "wait_time_avg_ms": round(self._wait_total * 1000 / checkouts, 3) if checkouts else 0.0,
+            "wait_time_max_ms": round(self._wait_max * 1000, 3),
+        }
+
+
+def create_engine_from_url(url: str):
+    return create_async_engine(
+        to_async_url(url),
+        poolclass=InstrumentedQueuePool,
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_pre_ping=DB_POOL_PRE_PING,
+        pool_recycle=DB_POOL_RECYCLE,
+        pool_timeout=DB_POOL_TIMEOUT,
+    )
+
+
+# engine และ session factory เดียวที่ใช้ร่วมกันทั้งแอป
+engine = create_engine_from_url(DATABASE_URL)
+SessionLocal = async_sessionmaker(engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+
+
+class Replica:
+    def __init__(self, url: str):
+        self.name = make_url(url).render_as_string(hide_password=True)
+        self.engine = create_engine_from_url(url)
+        self.SessionLocal = async_sessionmaker(self.engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+        self.unhealthy_until = 0.0
+
+
+replicas = [Replica(url) for url in DATABASE_REPLICA_URLS]
+_replica_counter = itertools.count()
+# client -> เวลา (monotonic) ที่ยังต้องอ่านจาก primary
+_recent_writers: OrderedDict[str, float] = OrderedDict()
+
+
+def _client_key(request: Request) -> str:
+    # ใช้ token ถ้ามี (ผู้ใช้คนเดียวกันหลาย IP) ไม่งั้นใช้ IP
+    identity = request.headers.get("authorization") or (request.client.host if request.client else "")
+    return hashlib.sha256(identity.encode("utf-8")).hexdigest()[:32]
+
+
+def mark_write(request: Request):
+    key = _client_key(request)
+    _recent_writers[key] = time.monotonic() + DB_REPLICA_STICKY_SECONDS
+    _recent_writers.move_to_end(key)
+    while len(_recent_writers) > DB_REPLICA_STICKY_MAX_CLIENTS:
+        _recent_writers.popitem(last=False)
+
+
+def is_sticky(request: Request) -> bool:
+    key = _client_key(request)
+    until = _recent_writers.get(key)
+    if until is None:
+        return False
+    if until < time.monotonic():
+        _recent_writers.pop(key, None)
+        return False
+    return True
+
+
+async def _open_replica_session():
+    """เลือก replica แบบ round-robin ข้าม replica ที่เพิ่งเชื่อมต่อไม่ได้ คืน None ถ้าไม่มีตัวไหนใช้ได้"""
+    start = next(_replica_counter)
+    for i in range(len(replicas)):
+        replica = replicas[(start + i) % len(replicas)]
+        if replica.unhealthy_until > time.monotonic():
+            continue
+        session = replica.SessionLocal()
+        try:
+            await session.connection()
+            return session
+        except (DBAPIError, OSError) as e:
+            await session.close()
+            replica.unhealthy_until = time.monotonic() + DB_REPLICA_RETRY_SECONDS
+            logger.warning("Replica %s is unavailable, falling back: %s", replica.name, e)
+    return None
+
+
+# Dependency สำหรับ handler ที่เขียนข้อมูล (ใช้ primary เสมอ)
+async def get_db(request: Request):
+    async with SessionLocal() as db:
+        try:
+            yield db
+        finally:
+            if request.method not in ("GET", "HEAD"):
+                mark_write(request)
+
+
+async def open_read_session(request: Request):
+    """เปิด session สำหรับอ่าน (replica ถ้ามี) ผู้เรียกต้องปิดเอง
+    ใช้ตรง ๆ กับงานที่อยู่นานกว่า dependency เช่น StreamingResponse"""
+    db = None
+    if replicas and not is_sticky(request):
+        db = await _open_replica_session()
+    return db if db is not None else SessionLocal()
+
+
+# Dependency สำหรับ handler ที่อ่านอย่างเดียว (ใช้ replica ถ้ามี)
+async def get_read_db(request: Request):
+    async with await open_read_session(request) as db:
+        yield db
+
+
+async def dispose_engines():
+    await engine.dispose()
+    for replica in replicas:
+        await replica.engine.dispose()
+
+
+def pool_stats() -> dict:
+    return engine.pool.stats()
+
+
+def replica_stats() -> list[dict]:
+    now = time.monotonic()
+    return [
+        {"replica": replica.name, "healthy": replica.unhealthy_until <= now, "pool": replica.engine.pool.stats()}
+        for replica in replicas
+    ]
@@ -0,0 +1,159 @@
+import os
+import re
+import asyncio
+from collections import defaultdict
+from datetime import date
+from functools import lru_cache
+from string import Formatter
+from dotenv import load_dotenv
+from sqlalchemy import select, update, insert, func
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.exc import IntegrityError, OperationalError
+from .database import engine
+from .models import DocCounter
+
+# โหลด environment variables
+load_dotenv()
+
+# จำนวนเลขที่จองไว้ในหน่วยความจำต่อ worker ต่อครั้ง
+# 1 = เรียงเลขต่อเนื่องทุก worker, มากกว่า 1 = ลดการล็อกแต่เลขอาจข้ามเมื่อ worker restart
+DOCNO_BLOCK_SIZE = int(os.getenv("DOCNO_BLOCK_SIZE", 1))
+# จำนวนครั้งที่ลองจองใหม่เมื่อชนกัน (ใช้กับฐานข้อมูลที่ไม่มี upsert)
+DOCNO_RESERVE_RETRIES = int(os.getenv("DOCNO_RESERVE_RETRIES", 5))
+
+# รูปแบบเลขที่เอกสาร ใช้ได้: {seq} {compcode} {year} {yy} {mm}
+# ตัวนับแยกตามบริษัทและปี po_poid จึงมีปีนำหน้า (เช่น 2024000001) ไม่ซ้ำกันข้ามปีและไม่ชนกับ po_poid เดิม (1..N)
+# แต่ไม่ซ้ำเฉพาะภายในบริษัทเดียวกัน (ต่างบริษัทอาจได้ po_poid เดียวกัน)
+DOCNO_PO_POID_PATTERN = os.getenv("DOCNO_PO_POID_PATTERN", "{year}{seq:06d}")
+DOCNO_PO_PONO_PATTERN = os.getenv("DOCNO_PO_PONO_PATTERN", "PO{yy}{mm}-{seq:05d}")
+DOCNO_PR_PRNO_PATTERN = os.getenv("DOCNO_PR_PRNO_PATTERN", "PR{yy}{mm}-{seq:05d}")
+
+
+class DocumentNumberAllocator:
+    """จองเลขที่เอกสารจากตาราง doc_counter ทีละ block
+
+    การจองแต่ละครั้งเป็น transaction สั้นๆ บน connection แยกจาก request
+    เพื่อไม่ให้ row lock ของตัวนับค้างอยู่ตลอด transaction ของการสร้างเอกสาร
+    """
+
+    def __init__(self, block_size: int = DOCNO_BLOCK_SIZE):
+        self.block_size = max(block_size, 1)
+        self._blocks: dict[tuple, list[int]] = {}
+        self._locks: defaultdict[tuple, asyncio.Lock] = defaultdict(asyncio.Lock)
+
+    async def _reserve(self, doc_type: str, compcode: str, year: int, count: int) -> int:
+        """จองเลข count ตัว คืนค่าเลขแรกของ block"""
+        dialect = engine.dialect.name
+        async with engine.begin() as conn:
+            if dialect == "mysql":
+                # upsert คำสั่งเดียว: สร้างแถวหรือเพิ่มค่าแบบ atomic แล้วอ่านค่าผ่าน LAST_INSERT_ID() ของ connection นี้
+                # (UPDATE แล้วค่อย INSERT จะติด gap lock และ deadlock เมื่อสองคนสร้างแถวใหม่พร้อมกัน)
+                await conn.execute(
+                    mysql_insert(DocCounter)
+                    .values(doc_type=doc_type, compcode=compcode, year=year, last_value=func.last_insert_id(count))
+                    .on_duplicate_key_update(last_value=func.last_insert_id(DocCounter.last_value + count))
+                )
+                last_value = (await conn.execute(select(func.last_insert_id()))).scalar_one()
+                return last_value - count + 1
+            if dialect == "sqlite":
+                stmt = sqlite_insert(DocCounter).values(doc_type=doc_type, compcode=compcode, year=year, last_value=count)
+                last_value = (await conn.execute(
+                    stmt.on_conflict_do_update(
+                        index_elements=[DocCounter.doc_type, DocCounter.compcode, DocCounter.year],
+                        set_={"last_value": DocCounter.last_value + count},
+                    ).returning(DocCounter.last_value)
+                )).scalar_one()
+                return last_value - count + 1
+        return await self._reserve_portable(doc_type, compcode, year, count)
+
+    async def _reserve_portable(self, doc_type: str, compcode: str, year: int, count: int) -> int:
+        # ฐานข้อมูลอื่นที่ไม่มี upsert: UPDATE ก่อน ถ้าไม่มีแถวค่อย INSERT และลองใหม่เมื่อชนกัน
+        condition = (
+            (DocCounter.doc_type == doc_type)
+            & (DocCounter.compcode == compcode)
+            & (DocCounter.year == year)
+        )
+        for attempt in range(DOCNO_RESERVE_RETRIES):
+            try:
+                async with engine.begin() as conn:
+                    # UPDATE ก่อนเพื่อถือ row lock แล้วจึงอ่านค่าที่เพิ่งเพิ่ม
+                    result = await conn.execute(
+                        update(DocCounter).where(condition).values(last_value=DocCounter.last_value + count)
+                    )
+                    if result.rowcount == 0:
+                        await conn.execute(
+                            insert(DocCounter).values(doc_type=doc_type, compcode=compcode, year=year, last_value=count)
+                        )
+                        return 1
+                    last_value = (await conn.execute(select(DocCounter.last_value).where(condition))).scalar_one()
+                    return last_value - count + 1
+            except (IntegrityError, OperationalError):
+                # worker อื่นสร้างแถวตัวนับไปก่อนแล้ว หรือชน deadlock/lock wait ให้ลองใหม่ด้วย UPDATE
+                if attempt == DOCNO_RESERVE_RETRIES - 1:
+                    raise
+
+    async def next_value(self, doc_type: str, compcode: str | None, year: int) -> int:
+        key = (doc_type, compcode or "", year)
+        async with self._locks[key]:
+            block = self._blocks.get(key)
+            if block is None or block[0] > block[1]:
+                start = await self._reserve(*key, self.block_size)
+                block = self._blocks[key] = [start, start + self.block_size - 1]
+            value = block[0]
+            block[0] += 1
+            return value
+
+
+def format_number(pattern: str, seq: int, compcode: str | None, doc_date: date) -> str:
+    return pattern.format(
+        seq=seq,
+        compcode=compcode or "",
+        year=doc_date.year,
+        yy=f"{doc_date.year % 100:02d}",
+        mm=f"{doc_date.month:02d}",
+    )
+
+
+@lru_cache(maxsize=256)
+def number_regex(pattern: str, compcode: str | None, year: int) -> re.Pattern:
+    """regex ของเลขที่ที่ pattern สร้างได้ในบริษัทและปีนั้น (group 1 คือ seq) ใช้หาเลขล่าสุดจากข้อมูลเดิม"""
+    values = {"compcode": compcode or "", "year": year, "yy": f"{year % 100:02d}"}
+    parts = []
+    seq_seen = False
+    for literal, field, spec, _ in Formatter().parse(pattern):
+        parts.append(re.escape(literal))
+        if field is None:
+            continue
+        if field == "seq":
+            width = int(re.sub(r"\D", "", spec) or 0)
+            parts.append(rf"(\d{{{max(width, 1)},}})" if not seq_seen else r"\d+")
+            seq_seen = True
+        elif field == "mm":
+            parts.append(r"\d{2}")
+        else:
+            parts.append(re.escape(format(values[field], spec)))
+    return re.compile("".join(parts))
+
+
+def seq_from_number(pattern: str, number, compcode: str | None, year: int) -> int | None:
+    """seq ของเลขที่เดิมถ้าตรงกับ pattern ไม่งั้นคืน None"""
+    match = number_regex(pattern, compcode, year).fullmatch(str(number)) if number is not None else None
+    return int(match.group(1)) if match and match.groups() else None
+
+
+allocator = DocumentNumberAllocator()
+
+
+async def next_po_number(compcode: str | None, po_date: date) -> tuple[int, str]:
+    """คืนค่า (po_poid, po_pono) จากตัวนับเดียวกัน"""
+    seq = await allocator.next_value("po", compcode, po_date.year)
+    return (
+        int(format_number(DOCNO_PO_POID_PATTERN, seq, compcode, po_date)),
+        format_number(DOCNO_PO_PONO_PATTERN, seq, compcode, po_date),
+    )
+
+
+async def next_pr_number(compcode: str | None, pr_date: date) -> str:
+    seq = await allocator.next_value("pr", compcode, pr_date.year)
+    return format_number(DOCNO_PR_PRNO_PATTERN, seq, compcode, pr_date)
@@ -0,0 +1,29 @@
+import hashlib
+import orjson
+from fastapi import Request, Response
+
+
+def make_etag(*parts) -> str:
+    """strong ETag จากค่าที่บอกเวอร์ชันของข้อมูล (เช่น editdate, สถานะ, จำนวนรายการ)"""
+    digest = hashlib.sha256(repr(parts).encode("utf-8")).hexdigest()[:32]
+    return f'"{digest}"'
+
+
+def content_etag(content) -> str:
+    """strong ETag จากเนื้อหา JSON ของ response (ใช้กับข้อมูลที่อยู่ใน cache แล้ว)"""
+    digest = hashlib.sha256(orjson.dumps(content, option=orjson.OPT_SORT_KEYS)).hexdigest()[:32]
+    return f'"{digest}"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    # If-None-Match เปรียบเทียบแบบ weak ตาม RFC 9110 จึงตัด W/ ออกก่อน
+    return etag in (tag.strip().removeprefix("W/") for tag in header.split(","))
+
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers={"ETag": etag})
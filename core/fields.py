@@ -0,0 +1,32 @@
+from collections import defaultdict
+from fastapi import HTTPException
+from sqlalchemy import select
+
+
+def parse_fields(fields: str | None, allowed, always=()) -> list[str] | None:
+    """แปลง ?fields=a,b,c เป็นรายชื่อ field ตาม whitelist ของ entity
+    คืน None ถ้าไม่ได้ระบุ (ให้ endpoint ส่งข้อมูลเต็มตามเดิม) field ใน always จะถูกใส่ให้เสมอ"""
+    if not fields:
+        return None
+    names = [name.strip() for name in fields.split(",") if name.strip()]
+    unknown = [name for name in names if name not in allowed]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"ไม่รู้จัก fields: {', '.join(unknown)}")
+    return list(dict.fromkeys([*always, *names]))
+
+
+def select_fields(model, names):
+    """SELECT เฉพาะคอลัมน์ที่ขอ (ข้าม field ที่ไม่ใช่คอลัมน์ เช่น items)
+    แถวที่ได้ไม่มี attribute ของคอลัมน์อื่น จึงไม่ถูกใส่ใน response เมื่อใช้ response_model_exclude_unset"""
+    columns = model.__table__.columns
+    return select(*[getattr(model, name) for name in names if name in columns])
+
+
+async def load_children(db, model, parent_key, parent_ids) -> dict:
+    """โหลดรายการลูกของหลาย parent ใน query เดียว คืน dict {parent_id: [rows]}"""
+    children = defaultdict(list)
+    if parent_ids:
+        result = await db.execute(select(model).filter(parent_key.in_(parent_ids)).order_by(*model.__table__.primary_key))
+        for child in result.scalars().all():
+            children[getattr(child, parent_key.key)].append(child)
+    return children
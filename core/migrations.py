@@ -0,0 +1,209 @@
+"""Migration แบบมีเวอร์ชันสำหรับ schema ที่มีอยู่แล้วใน production
+
+ใช้งาน:
+    python -m core.migrations upgrade   # รัน migration ที่ยังไม่ได้รัน
+    python -m core.migrations status    # ดูว่ารันไปถึงเวอร์ชันไหนแล้ว
+    python -m core.migrations explain   # EXPLAIN query หลักและ fail ถ้าเป็น full scan
+"""
+import sys
+import asyncio
+import argparse
+from datetime import datetime
+from sqlalchemy import select, insert, update, inspect
+from sqlalchemy.schema import CreateIndex
+from .database import engine
+from .models import DocCounter, SchemaMigration
+from .docnumber import DOCNO_PO_POID_PATTERN, DOCNO_PO_PONO_PATTERN, DOCNO_PR_PRNO_PATTERN, seq_from_number
+from application.po.models import PurchaseOrder, PurchaseOrderItem
+from application.pr.prModels import Pr, PrItem
+from setup.company.models import Company
+from setup.users.models import User, RefreshToken
+
+
+def _index(table, name):
+    return next(index for index in table.indexes if index.name == name)
+
+
+def create_index_online(conn, index):
+    """สร้าง index ถ้ายังไม่มี โดยไม่ล็อกตารางบน MySQL (ALGORITHM=INPLACE, LOCK=NONE)
+    ข้ามถ้ามี index ชื่อเดียวกัน หรือมี index บนคอลัมน์ชุดเดียวกันอยู่แล้ว (เช่น index ที่ MySQL สร้างให้ foreign key)"""
+    columns = [column.name for column in index.columns]
+    for existing in inspect(conn).get_indexes(index.table.name):
+        if existing["name"] == index.name or existing["column_names"] == columns:
+            return
+    ddl = str(CreateIndex(index).compile(dialect=conn.dialect))
+    if conn.dialect.name == "mysql":
+        ddl += " ALGORITHM=INPLACE LOCK=NONE"
+    conn.exec_driver_sql(ddl)
+
+
+def _0001_doc_counter(conn):
+    DocCounter.__table__.create(conn, checkfirst=True)
+
+
+def _0002_hot_lookup_indexes(conn):
+    for index in (
+        _index(PurchaseOrder.__table__, "ix_po_po_pono"),
+        _index(PurchaseOrderItem.__table__, "ix_po_item_poid"),
+        _index(Pr.__table__, "ix_pr_prno_compcode"),
+        _index(PrItem.__table__, "ix_pr_item_ref_compcode_status"),
+        _index(User.__table__, "ix_member_m_email"),
+        _index(Company.__table__, "ix_company_company_name"),
+    ):
+        create_index_online(conn, index)
+
+
+def _0003_refresh_token(conn):
+    RefreshToken.__table__.create(conn, checkfirst=True)
+
+
+def _0004_pr_list_filter_indexes(conn):
+    for index in (
+        _index(Pr.__table__, "ix_pr_compcode_status_po_open"),
+        _index(Pr.__table__, "ix_pr_compcode_project"),
+        _index(Pr.__table__, "ix_pr_compcode_prdate"),
+        _index(PrItem.__table__, "ix_pr_item_prid"),
+    ):
+        create_index_online(conn, index)
+
+
+def _0005_seed_doc_counter(conn):
+    """ตั้งค่าตัวนับจากเลขที่เอกสารที่มีอยู่แล้ว เพื่อไม่ให้เอกสารใหม่ได้เลขซ้ำกับของเดิม
+    ใช้ seq ที่มากที่สุดของเลขที่ตรงกับ pattern ปัจจุบัน แยกตามประเภทเอกสาร บริษัท และปีของวันที่เอกสาร"""
+    sources = (
+        ("po", select(PurchaseOrder.compcode, PurchaseOrder.po_podate, PurchaseOrder.po_poid, PurchaseOrder.po_pono),
+         (DOCNO_PO_POID_PATTERN, DOCNO_PO_PONO_PATTERN)),
+        ("pr", select(Pr.compcode, Pr.pr_prdate, Pr.pr_prno), (DOCNO_PR_PRNO_PATTERN,)),
+    )
+    seeds = {}
+    for doc_type, query, patterns in sources:
+        for compcode, doc_date, *numbers in conn.execute(query.execution_options(stream_results=True)):
+            if doc_date is None:
+                continue
+            key = (doc_type, compcode or "", doc_date.year)
+            for pattern, number in zip(patterns, numbers):
+                seq = seq_from_number(pattern, number, compcode, doc_date.year)
+                if seq is not None and seq > seeds.get(key, 0):
+                    seeds[key] = seq
+
+    for (doc_type, compcode, year), seq in seeds.items():
+        condition = (DocCounter.doc_type == doc_type) & (DocCounter.compcode == compcode) & (DocCounter.year == year)
+        current = conn.execute(select(DocCounter.last_value).where(condition)).scalar()
+        if current is None:
+            conn.execute(insert(DocCounter).values(doc_type=doc_type, compcode=compcode, year=year, last_value=seq))
+        elif current < seq:
+            conn.execute(update(DocCounter).where(condition).values(last_value=seq))
+
+
+# (เวอร์ชัน, ชื่อ, ฟังก์ชัน) เพิ่มต่อท้ายเท่านั้น ห้ามแก้ migration ที่รันไปแล้ว
+MIGRATIONS = [
+    (1, "create doc_counter", _0001_doc_counter),
+    (2, "hot lookup indexes", _0002_hot_lookup_indexes),
+    (3, "create refresh_token", _0003_refresh_token),
+    (4, "pr list filter indexes", _0004_pr_list_filter_indexes),
+    (5, "seed doc_counter from existing documents", _0005_seed_doc_counter),
+]
+
+
+async def applied_versions() -> set[int]:
+    async with engine.begin() as conn:
+        await conn.run_sync(SchemaMigration.__table__.create, checkfirst=True)
+        return set((await conn.execute(select(SchemaMigration.version))).scalars().all())
+
+
+async def upgrade():
+    applied = await applied_versions()
+    for version, name, migrate in MIGRATIONS:
+        if version in applied:
+            continue
+        print(f"Applying migration {version:04d} {name}")
+        # DDL ของ MySQL commit ทันที migration จึงต้องรันซ้ำได้ (idempotent)
+        async with engine.begin() as conn:
+            await conn.run_sync(migrate)
+            await conn.execute(insert(SchemaMigration).values(version=version, name=name, applied_at=datetime.now()))
+
+
+async def status():
+    applied = await applied_versions()
+    for version, name, _ in MIGRATIONS:
+        print(f"{version:04d} {name}: {'applied' if version in applied else 'pending'}")
+
+
+# query ที่ถูกเรียกบ่อยที่สุด ต้องใช้ index เสมอ
+HOT_QUERIES = {
+    "po by po_pono": select(PurchaseOrder.po_id).where(PurchaseOrder.po_pono == "PO"),
+    "po_item by poid": select(PurchaseOrderItem.poi_id).where(PurchaseOrderItem.poid == 1),
+    "pr by pr_prno/compcode": select(Pr.pr_prid).where(Pr.pr_prno == "PR", Pr.compcode == "C"),
+    "pr_item by pri_ref/compcode/pri_status": select(PrItem.pri_id).where(
+        PrItem.pri_ref == "PR", PrItem.compcode == "C", PrItem.pri_status == "open"
+    ),
+    "pr list by compcode/pr_status/po_open": select(Pr.pr_prid).where(
+        Pr.compcode == "C", Pr.pr_status == "enable", Pr.po_open == "no"
+    ),
+    "pr list by compcode/pr_project": select(Pr.pr_prid).where(Pr.compcode == "C", Pr.pr_project == "P"),
+    "pr list by compcode/pr_prdate range": select(Pr.pr_prid).where(
+        Pr.compcode == "C", Pr.pr_prdate.between("2024-01-01", "2024-01-31")
+    ),
+    "pr_item by prid": select(PrItem.pri_id).where(PrItem.prid == 1),
+    "member by m_email": select(User.m_id).where(User.m_email == "user@example.com"),
+    "company by company_name": select(Company.company_id).where(Company.company_name == "C"),
+    "refresh_token by token_hash": select(RefreshToken.id).where(RefreshToken.token_hash == "0" * 64),
+}
+
+
+def _explain(conn, sql):
+    """คืนค่า (full_scan, has_candidate_index, plan)"""
+    if conn.dialect.name == "sqlite":
+        rows = conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}").all()
+        details = [row[-1] for row in rows]
+        full_scan = any(d.startswith("SCAN") and "USING" not in d for d in details)
+        return full_scan, not full_scan, "; ".join(details)
+    rows = conn.exec_driver_sql(f"EXPLAIN {sql}").mappings().all()
+    full_scan = any(row["type"] == "ALL" for row in rows)
+    has_index = all(row["possible_keys"] for row in rows)
+    plan = "; ".join(f"{row['table']}: type={row['type']} key={row['key']}" for row in rows)
+    return full_scan, has_index, plan
+
+
+async def explain(strict: bool = False) -> bool:
+    """EXPLAIN query หลัก คืน False ถ้ามี full scan ที่ไม่มี index ให้ใช้
+    strict=True (ใช้ใน CI/ก่อน deploy) นับ full scan ทุกกรณีเป็น FAIL แม้จะมี index ให้เลือก"""
+    ok = True
+    async with engine.connect() as conn:
+        for name, query in HOT_QUERIES.items():
+            sql = str(query.compile(dialect=conn.dialect, compile_kwargs={"literal_binds": True}))
+            full_scan, has_index, plan = await conn.run_sync(_explain, sql)
+            if full_scan and (strict or not has_index):
+                ok = False
+                print(f"FAIL {name}: full scan ({plan})")
+            elif full_scan:
+                # มี index ให้ใช้แต่ optimizer เลือก scan (มักเกิดกับตารางเล็ก)
+                print(f"WARN {name}: full scan although an index exists ({plan})")
+            else:
+                print(f"OK   {name}: {plan}")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Database migrations")
+    parser.add_argument("command", choices=["upgrade", "status", "explain"])
+    parser.add_argument("--strict", action="store_true", help="explain: ถือว่า full scan (type=ALL) ทุกกรณีเป็น FAIL")
+    args = parser.parse_args()
+
+    async def run():
+        try:
+            if args.command == "upgrade":
+                await upgrade()
+            elif args.command == "status":
+                await status()
+            else:
+                return await explain(strict=args.strict)
+            return True
+        finally:
+            await engine.dispose()
+
+    sys.exit(0 if asyncio.run(run()) else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,21 @@
+from sqlalchemy import Column, Integer, String, DateTime
+from sqlalchemy.ext.declarative import declarative_base
+
+Base = declarative_base()
+
+class DocCounter(Base):
+    __tablename__ = 'doc_counter'
+
+    # ตัวนับเลขที่เอกสาร แยกตามประเภทเอกสาร บริษัท และปี
+    doc_type = Column(String(20), primary_key=True, comment='ประเภทเอกสาร')
+    compcode = Column(String(45), primary_key=True, comment='รหัสบริษัท')
+    year = Column(Integer, primary_key=True, autoincrement=False, comment='ปี')
+    last_value = Column(Integer, nullable=False, server_default='0', comment='เลขล่าสุดที่จองไปแล้ว')
+
+class SchemaMigration(Base):
+    __tablename__ = 'schema_migrations'
+
+    # ประวัติการรัน migration (ดู core/migrations.py)
+    version = Column(Integer, primary_key=True, autoincrement=False, comment='เลขเวอร์ชัน')
+    name = Column(String(200), nullable=False, comment='ชื่อ migration')
+    applied_at = Column(DateTime, nullable=False, comment='วันที่รัน')
@@ -0,0 +1,89 @@
+import base64
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from fastapi import HTTPException
+from sqlalchemy import and_, or_
+
+# ชื่อ header ที่ใช้ส่ง cursor ของหน้าถัดไปสำหรับ endpoint ที่คืนค่าเป็น list
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def _dump_value(value):
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    return value
+
+
+def _load_value(column, value):
+    # แปลงค่าใน cursor กลับเป็นชนิดเดียวกับคอลัมน์ก่อนนำไปเปรียบเทียบ
+    if value is None:
+        return None
+    try:
+        python_type = column.type.python_type
+    except NotImplementedError:
+        return value
+    if python_type is datetime:
+        return datetime.fromisoformat(value)
+    if python_type is date:
+        return date.fromisoformat(value)
+    if python_type is Decimal:
+        return Decimal(value)
+    return python_type(value)
+
+
+def encode_cursor(key_value, sort_value=None) -> str:
+    raw = json.dumps([_dump_value(sort_value), _dump_value(key_value)], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, key_column, sort_column=None):
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        sort_value, key_value = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        return _load_value(key_column, key_value), _load_value(sort_column, sort_value) if sort_column is not None else None
+    except (ValueError, TypeError, OverflowError):
+        # OverflowError: ตัวเลขเกินช่วง เช่น 1e400 แปลงเป็น int ไม่ได้
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def paginate(query, key_column, limit: int, cursor: str | None = None, skip: int = 0, sort_column=None, descending: bool = False):
+    """เรียงตาม (sort_column, key_column) และกรองด้วย cursor แทน OFFSET
+
+    ดึงเกินมา 1 แถวเพื่อให้ split_page รู้ว่ามีหน้าถัดไปหรือไม่
+    ถ้าไม่ส่ง cursor จะใช้ skip (OFFSET) แบบเดิม
+    sort_column ต้องไม่มีค่า NULL เพราะ NULL เปรียบเทียบด้วย < หรือ > ไม่ได้
+    """
+    columns = [key_column] if sort_column is None else [sort_column, key_column]
+    query = query.order_by(*[c.desc() if descending else c.asc() for c in columns])
+
+    if cursor:
+        key_value, sort_value = decode_cursor(cursor, key_column, sort_column)
+        after = (lambda c, v: c < v) if descending else (lambda c, v: c > v)
+        if sort_column is None:
+            query = query.filter(after(key_column, key_value))
+        else:
+            query = query.filter(or_(
+                after(sort_column, sort_value),
+                and_(sort_column == sort_value, after(key_column, key_value)),
+            ))
+    elif skip:
+        query = query.offset(skip)
+
+    return query.limit(limit + 1)
+
+
+def split_page(rows, key_column, limit: int, sort_column=None):
+    """ตัดแถวส่วนเกินออกและคืน (rows, next_cursor)"""
+    rows = list(rows)
+    if limit <= 0:
+        # ไม่มีแถวให้ทำ cursor ต่อ (endpoint ควรตรวจ limit >= 1 ไว้แล้ว)
+        return rows[:0], None
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    last = rows[-1]
+    sort_value = getattr(last, sort_column.key) if sort_column is not None else None
+    return rows, encode_cursor(getattr(last, key_column.key), sort_value)
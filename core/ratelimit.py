@@ -0,0 +1,109 @@
+import os
+import time
+from collections import OrderedDict
+from dotenv import load_dotenv
+
+# โหลด environment variables
+load_dotenv()
+
+# memory = นับใน process (ค่าเริ่มต้น), redis = นับร่วมกันทุก worker
+RATE_LIMIT_BACKEND = os.getenv("RATE_LIMIT_BACKEND", "memory")
+RATE_LIMIT_REDIS_URL = os.getenv("RATE_LIMIT_REDIS_URL", os.getenv("CACHE_REDIS_URL", "redis://localhost:6379/0"))
+RATE_LIMIT_MAX_KEYS = int(os.getenv("RATE_LIMIT_MAX_KEYS", 100000))
+
+
+class MemoryBackend:
+    """token bucket ใน process เก็บ bucket ล่าสุดไม่เกิน max_keys (LRU)"""
+
+    def __init__(self, max_keys: int = RATE_LIMIT_MAX_KEYS):
+        self.max_keys = max_keys
+        self._buckets: OrderedDict[str, tuple[float, float]] = OrderedDict()
+
+    async def take(self, key: str, capacity: int, rate: float) -> float:
+        now = time.monotonic()
+        tokens, updated = self._buckets.get(key, (capacity, now))
+        tokens = min(capacity, tokens + (now - updated) * rate)
+        if tokens >= 1:
+            tokens -= 1
+            retry_after = 0.0
+        else:
+            retry_after = (1 - tokens) / rate
+        self._buckets[key] = (tokens, now)
+        self._buckets.move_to_end(key)
+        while len(self._buckets) > self.max_keys:
+            self._buckets.popitem(last=False)
+        return retry_after
+
+
+# token bucket แบบ atomic บน Redis ใช้เวลาของ Redis เพื่อให้ทุก worker เห็นเวลาเดียวกัน
+_TOKEN_BUCKET_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'updated')
+local tokens = tonumber(bucket[1]) or capacity
+local updated = tonumber(bucket[2]) or now
+tokens = math.min(capacity, tokens + (now - updated) * rate)
+local retry_after = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+else
+    retry_after = (1 - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'updated', now)
+redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 1)
+return tostring(retry_after)
+"""
+
+
+class RedisBackend:
+    def __init__(self, url: str = RATE_LIMIT_REDIS_URL):
+        try:
+            import redis.asyncio as redis
+        except ImportError:
+            raise ValueError("RATE_LIMIT_BACKEND=redis requires the redis package (pip install redis).")
+        self._redis = redis.from_url(url)
+        self._script = self._redis.register_script(_TOKEN_BUCKET_SCRIPT)
+
+    async def take(self, key: str, capacity: int, rate: float) -> float:
+        return float(await self._script(keys=[key], args=[capacity, rate]))
+
+
+def create_backend():
+    if RATE_LIMIT_BACKEND == "redis":
+        return RedisBackend()
+    if RATE_LIMIT_BACKEND == "memory":
+        return MemoryBackend()
+    raise ValueError(f"Unknown RATE_LIMIT_BACKEND: {RATE_LIMIT_BACKEND}")
+
+
+backend = create_backend()
+
+
+class TokenBucketLimiter:
+    """อนุญาต burst ได้ capacity ครั้ง แล้วเติมคืน per_minute ครั้งต่อนาที"""
+
+    def __init__(self, name: str, capacity: int, per_minute: float):
+        self.name = name
+        self.capacity = capacity
+        self.rate = per_minute / 60
+        self.allowed = 0
+        self.rejected = 0
+
+    async def acquire(self, key: str) -> float:
+        """คืนค่า 0 ถ้าผ่าน หรือจำนวนวินาทีที่ต้องรอก่อนลองใหม่"""
+        retry_after = await backend.take(f"ratelimit:{self.name}:{key}", self.capacity, self.rate)
+        if retry_after:
+            self.rejected += 1
+        else:
+            self.allowed += 1
+        return retry_after
+
+    def stats(self) -> dict:
+        return {
+            "capacity": self.capacity,
+            "per_minute": self.rate * 60,
+            "allowed": self.allowed,
+            "rejected": self.rejected,
+        }
@@ -1,6 +1,13 @@
 from fastapi import FastAPI, APIRouter, Depends
+from fastapi.responses import ORJSONResponse
 from fastapi.openapi.utils import get_openapi
 from setup.users.auth import verify_token
+from core.database import dispose_engines, pool_stats, replica_stats
+from core.cache import cache_stats
+from core.compression import CompressionMiddleware
+from setup.users.passwords import password_hasher
+from setup.users.login import login_account_limiter, login_ip_limiter
+from setup.users import user_import
 
 # Import from setup folder
 from setup.users.user import router as user_router
@@ -20,10 +27,18 @@ from dotenv import load_dotenv
 from fastapi.responses import JSONResponse
 from fastapi.exceptions import RequestValidationError
 from fastapi import Request
+from contextlib import asynccontextmanager
 
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # schema ถูกจัดการด้วย python -m core.migrations upgrade
+    yield
+    user_import.shutdown()
+    await dispose_engines()
+
 # สร้าง FastAPI app หลัก
-app = FastAPI(title="Workflow Management System", version="1.0.0", description="API for Workflow Management System")
+app = FastAPI(title="Workflow Management System", version="1.0.0", description="API for Workflow Management System", lifespan=lifespan, default_response_class=ORJSONResponse)
 
 load_dotenv()
 
@@ -65,6 +80,9 @@ app.add_middleware(
     allow_headers=["*"],  # Allow all headers
 )
 
+# บีบอัด response JSON ขนาดใหญ่ (br ถ้ามี brotli ไม่งั้น gzip) ตั้งค่าผ่าน COMPRESSION_* ใน env
+app.add_middleware(CompressionMiddleware)
+
 @main_router.get("/secure-data")
 async def secure_data(payload: dict = Depends(verify_token)):
     return {"msg": f"Authorized user", "payload": payload}
@@ -78,6 +96,22 @@ async def index():
 async def check_health():
     return {"status": "healthy"}
 
+@main_router.get("/health/db", dependencies=[Depends(verify_token)])
+async def check_db_pool():
+    return {"status": "healthy", "pool": pool_stats(), "replicas": replica_stats()}
+
+@main_router.get("/health/cache", dependencies=[Depends(verify_token)])
+async def check_cache():
+    return {"status": "healthy", "cache": cache_stats()}
+
+@main_router.get("/health/login", dependencies=[Depends(verify_token)])
+async def check_login():
+    return {
+        "status": "healthy",
+        "password_hash": password_hasher.stats(),
+        "rate_limit": {"account": login_account_limiter.stats(), "ip": login_ip_limiter.stats()},
+    }
+
 # เพิ่ม routers เข้ากับ app หลัก
 app.include_router(main_router, prefix="/api/v1", tags=["Index"])
 
@@ -1,23 +1,22 @@
-from fastapi import APIRouter, HTTPException, Depends
-from sqlalchemy.orm import Session
-from sqlalchemy import create_engine
-from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
-import os
-from dotenv import load_dotenv
+from fastapi import APIRouter, HTTPException, Depends, Request, Response
+from sqlalchemy import select, func
+from sqlalchemy.ext.asyncio import AsyncSession
+from core.database import get_db, get_read_db
+from core.pagination import paginate, split_page
+from core.fields import parse_fields, select_fields
+from core.etag import content_etag, etag_matches, not_modified
+from core.cache import TTLCache
 from .models import Company
 from typing import List
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict, Field
 from datetime import date,datetime
 from ..users.auth import verify_token
 from typing import Optional
 
-# โหลด environment variables
-load_dotenv()
-# สร้าง SessionLocal class
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=create_engine(os.getenv("DATABASE_URL") or ""))
 # สร้าง router
 router = APIRouter()
+# cache ข้อมูลบริษัท (ข้อมูลหลักที่แทบไม่เปลี่ยน)
+company_cache = TTLCache("company")
 # Pydantic models
 class CompanyBase(BaseModel):
     company_code: str | None = None
@@ -115,15 +114,51 @@ class CompanyUpdate(BaseModel):
     wt_tax: str | None = None
 
 class PageFilter(BaseModel):
-    skip: Optional[int] = 0
-    limit: Optional[int] = 50
+    skip: Optional[int] = Field(0, ge=0)
+    limit: Optional[int] = Field(50, ge=1)
+    cursor: Optional[str] = None
 
 class CompanyFilter(BaseModel):
     search: Optional[str]
     page: PageFilter = PageFilter()
 
+# ข้อมูลบริษัทที่ส่งออกในหน้ารายการและหน้ารายละเอียด
+class CompanySummary(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    company_id: int
+    company_code: str | None = None
+    company_taxnum: str | None = None
+    company_name: str | None = None
+    company_address: str | None = None
+    company_tel: str | None = None
+    company_fax: str | None = None
+    company_email: str | None = None
+    company_contact: str | None = None
+    comp_img: str | None = None
+    compcode: str | None = None
+    ic_type: str | None = None
+    start_accost: str | None = None
+    end_accost: str | None = None
+    startrev: str | None = None
+    endrev: str | None = None
+    glrap: str | None = None
+    startexp: str | None = None
+    endexp: str | None = None
+    acdate: str | None = None
+    chkvat: str | None = None
+
+class CompanyDetailResponse(BaseModel):
+    resultLists: List[CompanySummary]
+    allRecords: int
+    totalPage: int
+    currentPage: int
+    recordsPerPage: int
+    recordsInPage: int
+    status: str
+
 class CompanyListResponse(BaseModel):
-    resultLists: List[CompanyBase]
+    resultLists: List[CompanySummary]
     totalRecords: int
     currentPage: int
     recordsPerPage: int
@@ -131,18 +166,11 @@ class CompanyListResponse(BaseModel):
     recordStart: int
     recordEnd: int
     status: str
+    nextCursor: Optional[str] = None
     
 
-# Dependency
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
 @router.post("/", response_model=dict)
-async def create_company(company: CompanyCreate, db: Session = Depends(get_db)):    
+async def create_company(company: CompanyCreate, db: AsyncSession = Depends(get_db)):    
     db_company = Company(
         company_code=company.company_code,
         company_taxnum=company.company_taxnum,
@@ -191,18 +219,22 @@ async def create_company(company: CompanyCreate, db: Session = Depends(get_db)):
         wt_taxen=company.wt_taxen
     )
     db.add(db_company)
-    db.commit()
-    db.refresh(db_company)
+    await db.commit()
+    await db.refresh(db_company)
+    # จำนวนบริษัทเปลี่ยน ต้องล้าง cache ทั้งหมดเพราะทุก entry มี allRecords
+    await company_cache.invalidate_prefix()
     return {"message": "Company created successfully", "company_id": db_company.company_id}
 
-@router.post("/companies/filter", response_model=CompanyListResponse)
-async def filter_companies(filter: CompanyFilter, db: Session = Depends(get_db)):    
-    query = db.query(Company)
+@router.post("/companies/filter", response_model=CompanyListResponse, response_model_exclude_unset=True)
+async def filter_companies(filter: CompanyFilter, fields: str | None = None, db: AsyncSession = Depends(get_read_db)):    
+    # SELECT เฉพาะคอลัมน์ที่แสดง (?fields= หรือทุก field ของ CompanySummary) แทนทั้งแถว
+    selected = parse_fields(fields, CompanySummary.model_fields, always=("company_id",)) or list(CompanySummary.model_fields)
+    query = select_fields(Company, selected)
     if filter.search :
         query = query.filter(Company.company_name.ilike(f"%{filter.search}%"))
 
     # print(query)
-    total_count = query.count()
+    total_count = (await db.execute(select(func.count()).select_from(query.subquery()))).scalar_one()
 
     limit = filter.page.limit or 50
     page = filter.page.skip or 0
@@ -210,47 +242,27 @@ async def filter_companies(filter: CompanyFilter, db: Session = Depends(get_db))
     offset = (page - 1) * limit
 
     
-    companies = query.offset(page).limit(limit).all()
+    companies, next_cursor = split_page(
+        (await db.execute(paginate(query, Company.company_id, limit, cursor=filter.page.cursor, skip=page))).all(),
+        Company.company_id, limit
+    )
     total_pages = (total_count // limit) + (1 if total_count % limit > 0 else 0)
     recordStart = offset + 1 if total_count > 0 else 0
     recordEnd = min(offset + limit, total_count)    
     return {
-        "resultLists": [
-            {   
-                "company_id": company.company_id,
-                "company_code": company.company_code,
-                "company_taxnum": company.company_taxnum,
-                "company_name": company.company_name,
-                "company_address": company.company_address,
-                "company_tel": company.company_tel,
-                "company_fax": company.company_fax,
-                "company_email": company.company_email,
-                "company_contact": company.company_contact,
-                "comp_img": company.comp_img,
-                "compcode": company.compcode,
-                "ic_type": company.ic_type,
-                "start_accost": company.start_accost,
-                "end_accost": company.end_accost,
-                "startrev": company.startrev,
-                "endrev": company.endrev,
-                "glrap": company.glrap,
-                "startexp": company.startexp,
-                "endexp": company.endexp,
-                "acdate": company.acdate,
-                "chkvat": company.chkvat,
-            } for company in companies
-        ],
+        "resultLists": companies,
         "totalRecords": total_count,
         "currentPage": page,
         "recordsPerPage": limit,
         "totalPage": total_pages,
         "recordStart": recordStart,
         "recordEnd": recordEnd,
-        "status": "success"
+        "status": "success",
+        "nextCursor": next_cursor
     }
 
 # @router.get("/", response_model=CompanyListResponse)
-# async def read_companies(search: str = "" , skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):    
+# async def read_companies(search: str = "" , skip: int = 0, limit: int = 100, db: AsyncSession = Depends(get_db)):    
 #     companies = db.query(Company).filter(Company.company_name.ilike(f"%{search}%")).offset(skip).limit(limit).all()
 #     print(companies)
 #     return {
@@ -288,67 +300,59 @@ async def filter_companies(filter: CompanyFilter, db: Session = Depends(get_db))
 #         "status": "success"
 #     }
 
-@router.get("/{company_id}", response_model=dict)
-async def read_company(company_id: int, db: Session = Depends(get_db)):    
-    db_company = db.query(Company).filter(Company.company_id == company_id).first()
-    print(db_company)
+@router.get("/{company_id}", response_model=CompanyDetailResponse, response_model_exclude_unset=True)
+async def read_company(company_id: int, request: Request, response: Response, fields: str | None = None, db: AsyncSession = Depends(get_read_db)):    
+    # cache เก็บเฉพาะผลลัพธ์แบบเต็มพร้อม ETag ถ้าขอ ?fields= จะ SELECT เฉพาะคอลัมน์ที่ขอโดยไม่ผ่าน cache
+    selected = parse_fields(fields, CompanySummary.model_fields, always=("company_id",))
+    entry = await company_cache.get(f"detail:{company_id}") if selected is None else None
+    if entry is None:
+        entry = await load_company_detail(db, company_id, selected)
+        if selected is None:
+            await company_cache.set(f"detail:{company_id}", entry)
+    if etag_matches(request, entry["etag"]):
+        return not_modified(entry["etag"])
+    response.headers["ETag"] = entry["etag"]
+    return entry["body"]
+
+async def load_company_detail(db: AsyncSession, company_id: int, selected: list[str] | None) -> dict:
+    query = select_fields(Company, selected or CompanySummary.model_fields)
+    db_company = (await db.execute(query.filter(Company.company_id == company_id))).first()
     if db_company is None:
         raise HTTPException(status_code=404, detail="Company not found")
-    db_company_count = db.query(Company).count()
+    db_company_count = (await db.execute(select(func.count()).select_from(Company))).scalar_one()
     total_pages = (db_company_count // 10) + (1 if db_company_count % 10 > 0 else 0)  # Assuming 10 records per page
-    result_dict = {
-        "resultLists": [
-            {
-                "company_id": db_company.company_id,
-                "company_code": db_company.company_code,
-                "company_taxnum": db_company.company_taxnum,
-                "company_name": db_company.company_name,
-                "company_address": db_company.company_address,
-                "company_tel": db_company.company_tel,
-                "company_fax": db_company.company_fax,
-                "company_email": db_company.company_email,
-                "company_contact": db_company.company_contact,
-                "comp_img": db_company.comp_img,
-                "compcode": db_company.compcode,
-                "ic_type": db_company.ic_type,
-                "start_accost": db_company.start_accost,
-                "end_accost": db_company.end_accost,
-                "startrev": db_company.startrev,
-                "endrev": db_company.endrev,
-                "glrap": db_company.glrap,
-                "startexp": db_company.startexp,
-                "endexp": db_company.endexp,
-                "acdate": db_company.acdate,
-                "chkvat": db_company.chkvat,
-            }
-        ],
-        "allRecords": db_company_count,
-        "totalPage": total_pages,
-        "currentPage": 1,
-        "recordsPerPage": 10,
-        "recordsInPage": 1,
-        "status": "success"
-    }
-
-    return result_dict
+    result = CompanyDetailResponse(
+        resultLists=[CompanySummary.model_validate(db_company)],
+        allRecords=db_company_count,
+        totalPage=total_pages,
+        currentPage=1,
+        recordsPerPage=10,
+        recordsInPage=1,
+        status="success"
+    )
+    result_dict = result.model_dump(mode="json", exclude_unset=True)
+    # ETag จากเนื้อหา คำนวณครั้งเดียวตอนโหลดแล้วเก็บคู่กับข้อมูลใน cache
+    return {"etag": content_etag(result_dict), "body": result_dict}
 
 @router.put("/{company_id}", response_model=dict)
-async def update_company(company_id: int, company: CompanyUpdate, db: Session = Depends(get_db)):    
-    db_company = db.query(Company).filter(Company.company_id == company_id).first()
+async def update_company(company_id: int, company: CompanyUpdate, db: AsyncSession = Depends(get_db)):    
+    db_company = (await db.execute(select(Company).filter(Company.company_id == company_id))).scalars().first()
     if db_company is None:
         raise HTTPException(status_code=404, detail="Company not found")
     update_data = company.dict(exclude_unset=True)
     for key, value in update_data.items():
         setattr(db_company, key, value)     
-    db.commit()
-    db.refresh(db_company)  
+    await db.commit()
+    await db.refresh(db_company)  
+    await company_cache.invalidate(f"detail:{company_id}")
     return {"message": "Company updated successfully", "company_id": db_company.company_id}
 
 @router.delete("/{company_id}", response_model=dict)
-async def delete_company(company_id: int, db: Session = Depends(get_db)):   
-    db_company = db.query(Company).filter(Company.company_id == company_id).first()
+async def delete_company(company_id: int, db: AsyncSession = Depends(get_db)):   
+    db_company = (await db.execute(select(Company).filter(Company.company_id == company_id))).scalars().first()
     if db_company is None:
         raise HTTPException(status_code=404, detail="Company not found")    
-    db.delete(db_company)
-    db.commit()
+    await db.delete(db_company)
+    await db.commit()
+    await company_cache.invalidate_prefix()
     return {"message": "Company deleted successfully"}
\ No newline at end of file
@@ -9,7 +9,7 @@ class Company(Base):
     company_id = Column(Integer, primary_key=True, index=True)
     company_code = Column(String(20), nullable=True)
     company_taxnum = Column(String(50), nullable=True)
-    company_name = Column(String(100), nullable=True)
+    company_name = Column(String(100), nullable=True, index=True)
     company_address = Column(String(255), nullable=True)
     company_tel = Column(String(100), nullable=True)
     company_fax = Column(String(100), nullable=True)
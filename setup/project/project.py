@@ -1,24 +1,20 @@
-from fastapi import APIRouter, HTTPException, Depends
-from sqlalchemy.orm import Session
-from sqlalchemy import create_engine
-from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
-import os
-from dotenv import load_dotenv
+from fastapi import APIRouter, HTTPException, Depends, Response, Query
+from sqlalchemy import select, func
+from sqlalchemy.ext.asyncio import AsyncSession
+from core.database import get_db, get_read_db
+from core.pagination import paginate, split_page, NEXT_CURSOR_HEADER
+from core.cache import TTLCache
+from core.fields import parse_fields, select_fields
 from .models import Project
 from typing import List
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
 from datetime import datetime
 from ..users.auth import verify_token 
 
-# โหลด environment variables
-load_dotenv()
-
-# สร้าง SessionLocal class
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=create_engine(os.getenv("DATABASE_URL") or ""))
-
 # สร้าง router
 router = APIRouter()
+# cache ข้อมูลโครงการ (ข้อมูลหลักที่แทบไม่เปลี่ยน)
+project_cache = TTLCache("project")
 
 # Pydantic models
 class ProjectBase(BaseModel):
@@ -43,16 +39,40 @@ class ProjectUpdate(BaseModel):
     project_tel: str | None = None
     project_email: str | None = None
 
-# Dependency
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+# ข้อมูลโครงการที่ส่งออก (dict ที่ได้จาก model_dump เก็บลง cache ได้ตรง ๆ)
+class ProjectOut(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    project_id: int
+    project_code: str | None = None
+    project_name: str | None = None
+    project_worktype: str | None = None
+    project_type: str | None = None
+    project_address: str | None = None
+    project_cname: str | None = None
+    project_tel: str | None = None
+    project_email: str | None = None
+
+class ProjectDetailResponse(BaseModel):
+    resultList: List[ProjectOut]
+    allRecords: int
+    TotalPage: int
+    CurrentPage: int
+    recordsPerPage: int
+    pageSize: int
+    navigatePages: int
+    navigatepageNums: List[int]
+    isFirstPage: bool
+    isLastPage: bool
+    hasPreviousPage: bool
+    hasNextPage: bool
+    navigateFirstPage: int
+    navigateLastPage: int
+    nextPage: int | None = None
+    prePage: int | None = None
 
 @router.post("/", response_model=dict)
-async def create_project(project: ProjectCreate, db: Session = Depends(get_db)):
+async def create_project(project: ProjectCreate, db: AsyncSession = Depends(get_db)):
     db_project = Project(
         project_code=project.project_code,
         project_name=project.project_name,
@@ -65,33 +85,29 @@ async def create_project(project: ProjectCreate, db: Session = Depends(get_db)):
     )
     db.add(db_project)
     try:
-        db.commit()
-        db.refresh(db_project)
+        await db.commit()
+        await db.refresh(db_project)
+        await project_cache.invalidate_prefix()
         return {"message": "สร้างโครงการสำเร็จ", "project_id": db_project.project_id}
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=400, detail=str(e))
 
-@router.get("/{project_id}", response_model=dict)
-async def read_project(project_id: int, db: Session = Depends(get_db)):
-    project = db.query(Project).filter(Project.project_id == project_id).first()
-    totalCount = db.query(Project).count()
+@router.get("/{project_id}", response_model=ProjectDetailResponse, response_model_exclude_unset=True)
+async def read_project(project_id: int, fields: str | None = None, db: AsyncSession = Depends(get_read_db)):
+    # cache เก็บเฉพาะผลลัพธ์แบบเต็ม ถ้าขอ ?fields= จะ SELECT เฉพาะคอลัมน์ที่ขอโดยไม่ผ่าน cache
+    selected = parse_fields(fields, ProjectOut.model_fields, always=("project_id",))
+    if selected is None:
+        cached = await project_cache.get(f"detail:{project_id}")
+        if cached is not None:
+            return cached
+    query = select_fields(Project, selected or ProjectOut.model_fields)
+    project = (await db.execute(query.filter(Project.project_id == project_id))).first()
+    totalCount = (await db.execute(select(func.count()).select_from(Project))).scalar_one()
     if project is None:
         raise HTTPException(status_code=404, detail="ไม่พบโครงการ")
-    return {
-        "resultList": [ 
-            {
-                "project_id": project.project_id,
-                "project_code": project.project_code,
-                "project_name": project.project_name,
-                "project_worktype": project.project_worktype,
-                "project_type": project.project_type,
-                "project_address": project.project_address,
-                "project_cname": project.project_cname,
-                "project_tel": project.project_tel,
-                "project_email": project.project_email
-            }
-        ],        
+    result = {
+        "resultList": [ProjectOut.model_validate(project).model_dump(exclude_unset=True)],
         "allRecords": totalCount,
         "TotalPage": (totalCount // 100) + (1 if totalCount % 100 > 0 else 0),
         "CurrentPage": 1,
@@ -109,25 +125,30 @@ async def read_project(project_id: int, db: Session = Depends(get_db)):
         "prePage": None
 
     }
+    if selected is None:
+        await project_cache.set(f"detail:{project_id}", result)
+    return result
 
-@router.get("/", response_model=List[dict])
-async def read_projects(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    projects = db.query(Project).offset(skip).limit(limit).all()
-    return [{
-        "project_id": project.project_id,
-        "project_code": project.project_code,
-        "project_name": project.project_name,
-        "project_worktype": project.project_worktype,
-        "project_type": project.project_type,
-        "project_address": project.project_address,
-        "project_cname": project.project_cname,
-        "project_tel": project.project_tel,
-        "project_email": project.project_email
-    } for project in projects]
+@router.get("/", response_model=List[ProjectOut], response_model_exclude_unset=True)
+async def read_projects(response: Response, skip: int = Query(0, ge=0), limit: int = Query(100, ge=1), cursor: str | None = None, fields: str | None = None, db: AsyncSession = Depends(get_read_db)):
+    selected = parse_fields(fields, ProjectOut.model_fields, always=("project_id",)) or list(ProjectOut.model_fields)
+    cache_key = f"list:{skip}:{limit}:{cursor}:{','.join(selected)}"
+    cached = await project_cache.get(cache_key)
+    if cached is not None:
+        if cached["next_cursor"]:
+            response.headers[NEXT_CURSOR_HEADER] = cached["next_cursor"]
+        return cached["items"]
+    query = paginate(select_fields(Project, selected), Project.project_id, limit, cursor=cursor, skip=skip)
+    projects, next_cursor = split_page((await db.execute(query)).all(), Project.project_id, limit)
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    items = [ProjectOut.model_validate(project).model_dump(exclude_unset=True) for project in projects]
+    await project_cache.set(cache_key, {"items": items, "next_cursor": next_cursor})
+    return items
 
 @router.put("/{project_id}", response_model=dict)
-async def update_project(project_id: int, project: ProjectUpdate, db: Session = Depends(get_db)):
-    db_project = db.query(Project).filter(Project.project_id == project_id).first()
+async def update_project(project_id: int, project: ProjectUpdate, db: AsyncSession = Depends(get_db)):
+    db_project = (await db.execute(select(Project).filter(Project.project_id == project_id))).scalars().first()
     if db_project is None:
         raise HTTPException(status_code=404, detail="ไม่พบโครงการ")
     
@@ -136,23 +157,26 @@ async def update_project(project_id: int, project: ProjectUpdate, db: Session =
         setattr(db_project, key, value)
     
     try:
-        db.commit()
+        await db.commit()
+        await project_cache.invalidate(f"detail:{project_id}")
+        await project_cache.invalidate_prefix("list:")
         return {"message": "อัพเดทข้อมูลโครงการสำเร็จ"}
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=400, detail=str(e))
 
 @router.delete("/{project_id}", response_model=dict)
-async def delete_project(project_id: int, db: Session = Depends(get_db)):
-    project = db.query(Project).filter(Project.project_id == project_id).first()
+async def delete_project(project_id: int, db: AsyncSession = Depends(get_db)):
+    project = (await db.execute(select(Project).filter(Project.project_id == project_id))).scalars().first()
     if project is None:
         raise HTTPException(status_code=404, detail="ไม่พบโครงการ")
     
     try:
-        db.delete(project)
-        db.commit()
+        await db.delete(project)
+        await db.commit()
+        await project_cache.invalidate_prefix()
         return {"message": "ลบโครงการสำเร็จ"}
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=400, detail=str(e))
 
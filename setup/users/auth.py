@@ -2,15 +2,25 @@ from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 import jwt
 from datetime import datetime, timedelta
+from collections import OrderedDict
+import hashlib
+import threading
+import time
 import os
 
 SECRET_KEY = str(os.getenv("SECRET_KEY"))
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", 60))
+# จำนวน token ที่ตรวจแล้วเก็บไว้ไม่ต้อง decode ซ้ำ (0 = ปิด cache)
+TOKEN_CACHE_SIZE = int(os.getenv("TOKEN_CACHE_SIZE", 10000))
 
 # 👇 ใช้ HTTPBearer แทน
 security = HTTPBearer()
 
+# sha256(token) -> (exp, payload) เรียงตามการใช้งานล่าสุด (LRU)
+_token_cache: OrderedDict[bytes, tuple[float, dict]] = OrderedDict()
+_token_cache_lock = threading.Lock()
+
 def create_access_token(data: dict, expires_delta: int = ACCESS_TOKEN_EXPIRE_MINUTES):
     to_encode = data.copy()
     expire = datetime.utcnow() + timedelta(minutes=expires_delta)
@@ -18,12 +28,40 @@ def create_access_token(data: dict, expires_delta: int = ACCESS_TOKEN_EXPIRE_MIN
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
+def _cached_payload(key: bytes):
+    with _token_cache_lock:
+        entry = _token_cache.get(key)
+        if entry is None:
+            return None
+        exp, payload = entry
+        # token หมดอายุแล้วต้องไม่ถูกใช้จาก cache ให้ decode ใหม่เพื่อได้ error ที่ถูกต้อง
+        if exp <= time.time():
+            del _token_cache[key]
+            return None
+        _token_cache.move_to_end(key)
+        return payload
+
+def _cache_payload(key: bytes, payload: dict):
+    exp = payload.get("exp")
+    if not TOKEN_CACHE_SIZE or not isinstance(exp, (int, float)):
+        return
+    with _token_cache_lock:
+        _token_cache[key] = (exp, payload)
+        _token_cache.move_to_end(key)
+        while len(_token_cache) > TOKEN_CACHE_SIZE:
+            _token_cache.popitem(last=False)
+
 def verify_token(credentials: HTTPAuthorizationCredentials = Depends(security)):
     token = credentials.credentials
+    key = hashlib.sha256(token.encode("utf-8")).digest()
+    payload = _cached_payload(key)
+    if payload is not None:
+        return dict(payload)
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        return payload
     except jwt.ExpiredSignatureError:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token expired")
     except jwt.InvalidTokenError:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
+    _cache_payload(key, payload)
+    return dict(payload)
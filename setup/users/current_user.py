@@ -0,0 +1,45 @@
+import os
+from dataclasses import dataclass, asdict
+from fastapi import Depends, HTTPException, status
+from sqlalchemy import select
+from core.database import SessionLocal
+from core.cache import TTLCache
+from .models import User
+from .auth import verify_token
+
+CURRENT_USER_CACHE_TTL = int(os.getenv("CURRENT_USER_CACHE_TTL", 60))
+
+
+@dataclass(frozen=True, slots=True)
+class CurrentUser:
+    """ข้อมูลผู้ใช้ที่ login อยู่ (แก้ไขไม่ได้) ใช้กรองข้อมูลตามบริษัท/แผนก/โครงการ"""
+    m_id: int
+    m_email: str | None
+    m_code: str | None
+    m_firstname: str | None
+    m_lastname: str | None
+    compcode: str | None
+    m_department: str | None
+    m_project: str | None
+    user_type: str | None
+
+
+# cache ข้อมูลผู้ใช้ตาม user_id (ล้างเมื่อ update_user / delete_user)
+current_user_cache = TTLCache("current_user", ttl=CURRENT_USER_CACHE_TTL)
+_COLUMNS = [getattr(User, name) for name in CurrentUser.__dataclass_fields__]
+
+
+async def get_current_user(payload: dict = Depends(verify_token)) -> CurrentUser:
+    user_id = payload.get("user_id")
+    if user_id is None:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
+
+    cached = await current_user_cache.get(user_id)
+    if cached is None:
+        async with SessionLocal() as db:
+            row = (await db.execute(select(*_COLUMNS).filter(User.m_id == user_id))).first()
+        if row is None:
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
+        cached = asdict(CurrentUser(**row._mapping))
+        await current_user_cache.set(user_id, cached)
+    return CurrentUser(**cached)
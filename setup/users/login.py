@@ -1,43 +1,112 @@
-from fastapi import APIRouter, HTTPException, status
-from .models import User
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, Session
+from fastapi import APIRouter, HTTPException, Request, Depends, status
+from .models import User, RefreshToken
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from core.database import SessionLocal, get_db
+from core.ratelimit import TokenBucketLimiter
 from pydantic import BaseModel
 from passlib.context import CryptContext
-import os
-from dotenv import load_dotenv
-import bcrypt
 from .auth import create_access_token
+from .passwords import password_hasher
+from .tokens import hash_token, issue_refresh_token, revoke_family
+from datetime import datetime
+import math
+import os
 
-load_dotenv()
-
-DATABASE_URL = os.getenv("DATABASE_URL")
-if not DATABASE_URL:
-    raise ValueError("DATABASE_URL is not set in the environment variables.")
-
-engine = create_engine(DATABASE_URL)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 router = APIRouter()
 
+# จำกัดจำนวนครั้งที่ login ต่ออีเมลและต่อ IP เพื่อไม่ให้ bcrypt ใช้ CPU จนหมด
+login_account_limiter = TokenBucketLimiter(
+    "login:account",
+    capacity=int(os.getenv("LOGIN_RATE_ACCOUNT_CAPACITY", 5)),
+    per_minute=float(os.getenv("LOGIN_RATE_ACCOUNT_PER_MINUTE", 5)),
+)
+login_ip_limiter = TokenBucketLimiter(
+    "login:ip",
+    capacity=int(os.getenv("LOGIN_RATE_IP_CAPACITY", 50)),
+    per_minute=float(os.getenv("LOGIN_RATE_IP_PER_MINUTE", 60)),
+)
+
 class Login(BaseModel):
     email: str
     password: str
 
+class RefreshRequest(BaseModel):
+    refresh_token: str
+
 @router.post("/login", response_model=dict)
-async def login(users: Login):
-    with SessionLocal() as db:
-        userlogin = db.query(User).filter(User.m_email == users.email).first()
-        if not userlogin:
-            raise HTTPException(status_code=404, detail={"message": "User not found"})
-        
-        if not bcrypt.checkpw(users.password.encode('utf-8'), userlogin.m_pass.encode('utf-8')):
-            raise HTTPException(status_code=401, detail={"message": "Invalid password"})
-
-        access_token = create_access_token(data={"sub": userlogin.m_email, "user_id": userlogin.m_id})
-        return {
-            "access_token": access_token,
-            "token_type": "bearer",
-            "user_id": userlogin.m_id
-        }
\ No newline at end of file
+async def login(users: Login, request: Request):
+    # ตรวจ rate limit ก่อนค้นหา member และก่อนใช้ bcrypt
+    client_ip = request.client.host if request.client else "unknown"
+    for limiter, key in ((login_ip_limiter, client_ip), (login_account_limiter, users.email.strip().lower())):
+        retry_after = await limiter.acquire(key)
+        if retry_after:
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail={"message": "Too many login attempts"},
+                headers={"Retry-After": str(math.ceil(retry_after))},
+            )
+
+    # ปิด session ก่อนตรวจรหัสผ่าน เพื่อไม่ให้ถือ connection ไว้ระหว่างรอคิว bcrypt
+    async with SessionLocal() as db:
+        userlogin = (await db.execute(select(User).filter(User.m_email == users.email))).scalars().first()
+    if not userlogin:
+        raise HTTPException(status_code=404, detail={"message": "User not found"})
+    
+    if not await password_hasher.checkpw(users.password, userlogin.m_pass):
+        raise HTTPException(status_code=401, detail={"message": "Invalid password"})
+
+    async with SessionLocal() as db:
+        refresh_token = await issue_refresh_token(db, userlogin.m_id, userlogin.m_email)
+        await db.commit()
+
+    access_token = create_access_token(data={"sub": userlogin.m_email, "user_id": userlogin.m_id})
+    return {
+        "access_token": access_token,
+        "refresh_token": refresh_token,
+        "token_type": "bearer",
+        "user_id": userlogin.m_id
+    }
+
+@router.post("/refresh", response_model=dict)
+async def refresh(body: RefreshRequest, db: AsyncSession = Depends(get_db)):
+    # ค้นหาด้วย hash ของ token (unique index) ไม่ต้องใช้ bcrypt
+    stored = (await db.execute(
+        select(RefreshToken).filter(RefreshToken.token_hash == hash_token(body.refresh_token))
+    )).scalars().first()
+    if stored is None or stored.expires_at <= datetime.utcnow():
+        raise HTTPException(status_code=401, detail={"message": "Invalid refresh token"})
+
+    # หมุน token: token เดิมใช้ได้ครั้งเดียว ถ้าถูกใช้ซ้ำถือว่ารั่ว ให้ยกเลิกทั้ง family
+    rotated = await db.execute(
+        update(RefreshToken)
+        .where(RefreshToken.id == stored.id, RefreshToken.revoked_at.is_(None))
+        .values(revoked_at=datetime.utcnow())
+    )
+    if rotated.rowcount != 1:
+        await revoke_family(db, stored.family_id)
+        await db.commit()
+        raise HTTPException(status_code=401, detail={"message": "Invalid refresh token"})
+
+    refresh_token = await issue_refresh_token(db, stored.user_id, stored.subject, stored.family_id)
+    await db.commit()
+
+    access_token = create_access_token(data={"sub": stored.subject, "user_id": stored.user_id})
+    return {
+        "access_token": access_token,
+        "refresh_token": refresh_token,
+        "token_type": "bearer",
+        "user_id": stored.user_id
+    }
+
+@router.post("/logout", response_model=dict)
+async def logout(body: RefreshRequest, db: AsyncSession = Depends(get_db)):
+    stored = (await db.execute(
+        select(RefreshToken.family_id).filter(RefreshToken.token_hash == hash_token(body.refresh_token))
+    )).first()
+    if stored is not None:
+        await revoke_family(db, stored.family_id)
+        await db.commit()
+    return {"message": "Logged out"}
\ No newline at end of file
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, Text, text
+from sqlalchemy import Column, Integer, String, DateTime, Text, text, Index
 from sqlalchemy.ext.declarative import declarative_base
 
 Base = declarative_base()
@@ -18,7 +18,7 @@ class User(Base):
     m_position = Column(String(100))
     m_type = Column(String(100), server_default='employee')
     m_login = Column(DateTime, server_default=text('CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP'))
-    m_email = Column(String(100))
+    m_email = Column(String(100), index=True)
     m_project = Column(String(45))
     m_department = Column(String(45))
     m_tel = Column(String(20))
@@ -35,7 +35,22 @@ class User(Base):
     prekey = Column(String(100))
     user_status = Column(String(20))
     gender = Column(String(20))
+
 # End of Selection
 
+class RefreshToken(Base):
+    __tablename__ = 'refresh_token'
 
+    # เก็บเฉพาะ sha256 ของ refresh token ไม่เก็บ token จริง
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    token_hash = Column(String(64), nullable=False)
+    family_id = Column(String(32), nullable=False, index=True)
+    user_id = Column(Integer, nullable=False, index=True)
+    subject = Column(String(100))
+    created_at = Column(DateTime, nullable=False)
+    expires_at = Column(DateTime, nullable=False)
+    revoked_at = Column(DateTime)
 
+    __table_args__ = (
+        Index('ux_refresh_token_token_hash', 'token_hash', unique=True),
+    )
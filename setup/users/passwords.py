@@ -0,0 +1,103 @@
+import os
+import time
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from dotenv import load_dotenv
+from fastapi import HTTPException, status
+import bcrypt
+
+# โหลด environment variables
+load_dotenv()
+
+# bcrypt ปล่อย GIL ระหว่าง hash จึงรันใน thread pool ได้โดยไม่บล็อก event loop
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", 2))
+# จำนวน request ที่รอคิวได้ เกินนี้ตอบ 503 ทันที
+PASSWORD_HASH_MAX_QUEUE = int(os.getenv("PASSWORD_HASH_MAX_QUEUE", 64))
+# เวลารอคิวสูงสุด (วินาที)
+PASSWORD_HASH_QUEUE_TIMEOUT = float(os.getenv("PASSWORD_HASH_QUEUE_TIMEOUT", 5))
+
+
+class PasswordHasher:
+    """รัน bcrypt ใน thread pool ขนาดจำกัด พร้อมคิวที่มี timeout และเก็บสถิติ"""
+
+    def __init__(self, workers: int = PASSWORD_HASH_WORKERS, max_queue: int = PASSWORD_HASH_MAX_QUEUE,
+                 queue_timeout: float = PASSWORD_HASH_QUEUE_TIMEOUT):
+        self.workers = workers
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bcrypt")
+        self._slots = asyncio.Semaphore(workers)
+        self.queued = 0
+        self.running = 0
+        self.completed = 0
+        self.rejected = 0
+        self._hash_total = 0.0
+        self._hash_max = 0.0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+
+    def _busy(self):
+        self.rejected += 1
+        return HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail={"message": "Server is busy, please try again"},
+            headers={"Retry-After": "1"},
+        )
+
+    async def _acquire(self):
+        if not self._slots.locked():
+            await self._slots.acquire()
+            return
+        # ไม่มี worker ว่าง ต้องเข้าคิว
+        if self.queued >= self.max_queue:
+            raise self._busy()
+        self.queued += 1
+        try:
+            await asyncio.wait_for(self._slots.acquire(), timeout=self.queue_timeout)
+        except asyncio.TimeoutError:
+            raise self._busy()
+        finally:
+            self.queued -= 1
+
+    async def run(self, fn, *args):
+        start = time.perf_counter()
+        await self._acquire()
+        waited = time.perf_counter() - start
+        self._wait_total += waited
+        self._wait_max = max(self._wait_max, waited)
+
+        self.running += 1
+        start = time.perf_counter()
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+        finally:
+            elapsed = time.perf_counter() - start
+            self.running -= 1
+            self.completed += 1
+            self._hash_total += elapsed
+            self._hash_max = max(self._hash_max, elapsed)
+            self._slots.release()
+
+    async def checkpw(self, password: str, hashed: str) -> bool:
+        return await self.run(bcrypt.checkpw, password.encode('utf-8'), hashed.encode('utf-8'))
+
+    async def hashpw(self, password: str) -> str:
+        hashed = await self.run(bcrypt.hashpw, password.encode('utf-8'), bcrypt.gensalt())
+        return hashed.decode('utf-8')
+
+    def stats(self) -> dict:
+        completed = self.completed
+        return {
+            "workers": self.workers,
+            "queue_depth": self.queued,
+            "running": self.running,
+            "completed": completed,
+            "rejected": self.rejected,
+            "hash_time_avg_ms": round(self._hash_total * 1000 / completed, 3) if completed else 0.0,
+            "hash_time_max_ms": round(self._hash_max * 1000, 3),
+            "queue_wait_avg_ms": round(self._wait_total * 1000 / completed, 3) if completed else 0.0,
+            "queue_wait_max_ms": round(self._wait_max * 1000, 3),
+        }
+
+
+password_hasher = PasswordHasher()
@@ -0,0 +1,45 @@
+import os
+import uuid
+import hashlib
+import secrets
+from datetime import datetime, timedelta
+from sqlalchemy import insert, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from .models import RefreshToken
+
+REFRESH_TOKEN_EXPIRE_DAYS = int(os.getenv("REFRESH_TOKEN_EXPIRE_DAYS", 14))
+
+
+def hash_token(token: str) -> str:
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+
+async def issue_refresh_token(db: AsyncSession, user_id: int, subject: str | None, family_id: str | None = None) -> str:
+    """สร้าง refresh token ใหม่ (ยังไม่ commit) family_id เดียวกันคือ token ที่หมุนต่อกันมาจากการ login ครั้งเดียว"""
+    token = secrets.token_urlsafe(48)
+    now = datetime.utcnow()
+    await db.execute(insert(RefreshToken).values(
+        token_hash=hash_token(token),
+        family_id=family_id or uuid.uuid4().hex,
+        user_id=user_id,
+        subject=subject,
+        created_at=now,
+        expires_at=now + timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS),
+    ))
+    return token
+
+
+async def revoke_family(db: AsyncSession, family_id: str):
+    await db.execute(
+        update(RefreshToken)
+        .where(RefreshToken.family_id == family_id, RefreshToken.revoked_at.is_(None))
+        .values(revoked_at=datetime.utcnow())
+    )
+
+
+async def revoke_user_tokens(db: AsyncSession, user_id: int):
+    await db.execute(
+        update(RefreshToken)
+        .where(RefreshToken.user_id == user_id, RefreshToken.revoked_at.is_(None))
+        .values(revoked_at=datetime.utcnow())
+    )
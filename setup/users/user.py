@@ -1,24 +1,29 @@
-from fastapi import APIRouter, HTTPException, Depends
-from sqlalchemy.orm import Session
-from sqlalchemy import create_engine
-from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from fastapi import APIRouter, HTTPException, Depends, Response, Request, Query
+from sqlalchemy import select, insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from core.database import get_db, get_read_db
+from core.pagination import paginate, split_page, NEXT_CURSOR_HEADER
+from core.fields import parse_fields, select_fields
 import os
+import time
+import logging
 from dotenv import load_dotenv
 from .models import User
 from typing import List
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict, ValidationError, field_validator
 from datetime import datetime
 from ..users.auth import verify_token
+from .current_user import CurrentUser, get_current_user, current_user_cache
+from .tokens import revoke_user_tokens
+from .passwords import password_hasher
+from .user_import import parse_rows, hash_passwords, USER_IMPORT_BATCH_SIZE
 
 # โหลด environment variables
 load_dotenv()
 
-# สร้าง SessionLocal class
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=create_engine(os.getenv("DATABASE_URL") or ""))
-
 # สร้าง router
 router = APIRouter()
+logger = logging.getLogger(__name__)
 
 # Pydantic models
 class UserBase(BaseModel):
@@ -30,7 +35,7 @@ class UserBase(BaseModel):
     m_email: str
     m_position: str
     m_department: str
-    uimg: str
+    uimg: str | None = None
 
 class UserCreate(UserBase):
     pass
@@ -42,71 +47,161 @@ class UserUpdate(BaseModel):
     m_position: str | None = None
     m_department: str | None = None
 
-# Dependency
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
 APP_URL = os.getenv("APP_URL")
 IMAGE_URL = os.getenv("IMAGE_URL")
 
+class UserOut(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    m_id: int
+    m_code: str | None = None
+    m_firstname: str | None = None
+    m_lastname: str | None = None
+    m_email: str | None = None
+    m_position: str | None = None
+    m_department: str | None = None
+    uimg: str | None = None
+
+    @field_validator("uimg", mode="before")
+    @classmethod
+    def image_url(cls, value):
+        return (IMAGE_URL or "") + str(value)
+
 @router.post("/", response_model=dict)
-async def create_user(user: UserCreate, db: Session = Depends(get_db)):
+async def create_user(user: UserCreate, db: AsyncSession = Depends(get_db)):
     db_user = User(
         m_code=user.m_code,
         m_firstname=user.m_firstname,
         m_lastname=user.m_lastname,
         m_user=user.m_user,
-        m_pass=user.m_pass,
+        m_pass=await password_hasher.hashpw(user.m_pass),
         m_email=user.m_email,
         m_position=user.m_position,
-        m_department=user.m_department
+        m_department=user.m_department,
+        uimg=user.uimg
     )
     db.add(db_user)
     try:
-        db.commit()
-        db.refresh(db_user)
+        await db.commit()
+        await db.refresh(db_user)
         return {"message": "สร้างผู้ใช้สำเร็จ", "user_id": db_user.m_id}
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=400, detail=str(e))
 
-@router.get("/{user_id}", response_model=dict)
-async def read_user(user_id: int, db: Session = Depends(get_db)):
-    user = db.query(User).filter(User.m_id == user_id).first()
-    if user is None:
-        raise HTTPException(status_code=404, detail="ไม่พบผู้ใช้")
+async def _insert_users(db: AsyncSession, batch: list[tuple[int, dict]], errors: list) -> int:
+    # insert ทั้ง batch ในคำสั่งเดียว ถ้าพังค่อยไล่ทีละแถวเพื่อหาแถวที่ผิด
+    try:
+        async with db.begin_nested():
+            await db.execute(insert(User), [values for _, values in batch])
+        return len(batch)
+    except Exception:
+        pass
+    created = 0
+    for row_no, values in batch:
+        try:
+            async with db.begin_nested():
+                await db.execute(insert(User), [values])
+            created += 1
+        except Exception as e:
+            errors.append({"row": row_no, "m_email": values["m_email"], "error": str(e.orig if hasattr(e, "orig") else e)})
+    return created
+
+@router.post("/import", response_model=dict)
+async def import_users(request: Request, format: str = "jsonl", db: AsyncSession = Depends(get_db)):
+    """นำเข้าผู้ใช้จาก JSON lines หรือ CSV แถวที่ผิดจะถูกรายงานใน errors โดยไม่ยกเลิกแถวอื่น"""
+    start = time.perf_counter()
+    rows = parse_rows(await request.body(), format)
+
+    errors = []
+    valid = []
+    seen_emails = set()
+    for row_no, row in enumerate(rows, start=1):
+        if row is None:
+            errors.append({"row": row_no, "m_email": None, "error": "รูปแบบข้อมูลไม่ถูกต้อง"})
+            continue
+        try:
+            user = UserCreate(**row)
+        except ValidationError as e:
+            errors.append({"row": row_no, "m_email": row.get("m_email"), "error": e.errors(include_url=False, include_context=False)})
+            continue
+        except TypeError as e:
+            # key ที่ไม่ใช่ string ใช้เป็นชื่อ field ไม่ได้
+            errors.append({"row": row_no, "m_email": row.get("m_email"), "error": str(e)})
+            continue
+        email = user.m_email.lower()
+        if email in seen_emails:
+            errors.append({"row": row_no, "m_email": user.m_email, "error": "อีเมลซ้ำในไฟล์"})
+            continue
+        seen_emails.add(email)
+        valid.append((row_no, user))
+
+    created = 0
+    for i in range(0, len(valid), USER_IMPORT_BATCH_SIZE):
+        batch = valid[i:i + USER_IMPORT_BATCH_SIZE]
+        emails = [user.m_email for _, user in batch]
+        existing = set((await db.execute(select(User.m_email).filter(User.m_email.in_(emails)))).scalars().all())
+        pending = []
+        for row_no, user in batch:
+            if user.m_email in existing:
+                errors.append({"row": row_no, "m_email": user.m_email, "error": "มีอีเมลนี้ในระบบแล้ว"})
+            else:
+                pending.append((row_no, user))
+
+        hashes = await hash_passwords([user.m_pass for _, user in pending])
+        values = [(row_no, {
+            "m_code": user.m_code,
+            "m_firstname": user.m_firstname,
+            "m_lastname": user.m_lastname,
+            "m_user": user.m_user,
+            "m_pass": hashed,
+            "m_email": user.m_email,
+            "m_position": user.m_position,
+            "m_department": user.m_department,
+            "uimg": user.uimg,
+        }) for (row_no, user), hashed in zip(pending, hashes)]
+        created += await _insert_users(db, values, errors)
+        await db.commit()
+
+    elapsed = time.perf_counter() - start
+    rate = round(created / elapsed, 1) if elapsed else 0.0
+    logger.info("user import: %d created, %d failed in %.2fs (%.1f users/s)", created, len(errors), elapsed, rate)
+    errors.sort(key=lambda e: e["row"])
     return {
-        "m_id": user.m_id,
-        "m_code": user.m_code,
-        "m_firstname": user.m_firstname,
-        "m_lastname": user.m_lastname,
-        "m_email": user.m_email,
-        "m_position": user.m_position,
-        "m_department": user.m_department,
-        "uimg": (IMAGE_URL or "") + (str(user.uimg) or "")
+        "message": "นำเข้าผู้ใช้สำเร็จ",
+        "total": len(rows),
+        "created": created,
+        "failed": len(errors),
+        "errors": errors,
+        "elapsed_ms": round(elapsed * 1000, 1),
+        "users_per_second": rate
     }
 
-@router.get("/", response_model=List[dict])
-async def read_users(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    users = db.query(User).order_by(User.m_id.asc()).offset(skip).limit(limit).all()
-    return [{
-        "m_id": user.m_id,
-        "m_code": user.m_code,
-        "m_firstname": user.m_firstname,
-        "m_lastname": user.m_lastname,
-        "m_email": user.m_email,
-        "m_position": user.m_position,
-        "m_department": user.m_department,
-        "uimg": (IMAGE_URL or "") + (str(user.uimg) or "")
-    } for user in users]
+@router.get("/me", response_model=CurrentUser)
+async def read_current_user(current_user: CurrentUser = Depends(get_current_user)):
+    return current_user
+
+@router.get("/{user_id}", response_model=UserOut, response_model_exclude_unset=True)
+async def read_user(user_id: int, fields: str | None = None, db: AsyncSession = Depends(get_read_db)):
+    selected = parse_fields(fields, UserOut.model_fields, always=("m_id",)) or list(UserOut.model_fields)
+    user = (await db.execute(select_fields(User, selected).filter(User.m_id == user_id))).first()
+    if user is None:
+        raise HTTPException(status_code=404, detail="ไม่พบผู้ใช้")
+    return user
+
+@router.get("/", response_model=List[UserOut], response_model_exclude_unset=True)
+async def read_users(response: Response, skip: int = Query(0, ge=0), limit: int = Query(100, ge=1), cursor: str | None = None, fields: str | None = None, db: AsyncSession = Depends(get_read_db)):
+    # SELECT เฉพาะคอลัมน์ที่แสดง (?fields= หรือทุก field ของ UserOut) แทนทั้งแถว
+    selected = parse_fields(fields, UserOut.model_fields, always=("m_id",)) or list(UserOut.model_fields)
+    query = paginate(select_fields(User, selected), User.m_id, limit, cursor=cursor, skip=skip)
+    users, next_cursor = split_page((await db.execute(query)).all(), User.m_id, limit)
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return users
 
 @router.put("/{user_id}", response_model=dict)
-async def update_user(user_id: int, user: UserUpdate, db: Session = Depends(get_db)):
-    db_user = db.query(User).filter(User.m_id == user_id).first()
+async def update_user(user_id: int, user: UserUpdate, db: AsyncSession = Depends(get_db)):
+    db_user = (await db.execute(select(User).filter(User.m_id == user_id))).scalars().first()
     if db_user is None:
         raise HTTPException(status_code=404, detail="ไม่พบผู้ใช้")
     
@@ -115,22 +210,25 @@ async def update_user(user_id: int, user: UserUpdate, db: Session = Depends(get_
         setattr(db_user, key, value)
     
     try:
-        db.commit()
+        await db.commit()
+        await current_user_cache.invalidate(user_id)
         return {"message": "อัพเดทข้อมูลผู้ใช้สำเร็จ"}
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=400, detail=str(e))
 
 @router.delete("/{user_id}", response_model=dict)
-async def delete_user(user_id: int, db: Session = Depends(get_db)):
-    user = db.query(User).filter(User.m_id == user_id).first()
+async def delete_user(user_id: int, db: AsyncSession = Depends(get_db)):
+    user = (await db.execute(select(User).filter(User.m_id == user_id))).scalars().first()
     if user is None:
         raise HTTPException(status_code=404, detail="ไม่พบผู้ใช้")
     
     try:
-        db.delete(user)
-        db.commit()
+        await db.delete(user)
+        await revoke_user_tokens(db, user_id)
+        await db.commit()
+        await current_user_cache.invalidate(user_id)
         return {"message": "ลบผู้ใช้สำเร็จ"}
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=400, detail=str(e))
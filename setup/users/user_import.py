@@ -0,0 +1,77 @@
+import os
+import io
+import csv
+import json
+import asyncio
+from concurrent.futures import ProcessPoolExecutor
+from dotenv import load_dotenv
+from fastapi import HTTPException
+import bcrypt
+
+# โหลด environment variables
+load_dotenv()
+
+# import ผู้ใช้จำนวนมากใช้ process pool แยกจาก thread pool ของ login เพื่อไม่ให้แย่ง worker กัน
+USER_IMPORT_HASH_WORKERS = int(os.getenv("USER_IMPORT_HASH_WORKERS", os.cpu_count() or 1))
+USER_IMPORT_BATCH_SIZE = int(os.getenv("USER_IMPORT_BATCH_SIZE", 500))
+USER_IMPORT_MAX_ROWS = int(os.getenv("USER_IMPORT_MAX_ROWS", 10000))
+
+_executor: ProcessPoolExecutor | None = None
+
+
+def _get_executor() -> ProcessPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ProcessPoolExecutor(max_workers=USER_IMPORT_HASH_WORKERS)
+    return _executor
+
+
+def _hash_many(passwords: list[str]) -> list[str]:
+    # รันใน process ลูก ต้องเป็นฟังก์ชันระดับ module
+    return [bcrypt.hashpw(p.encode('utf-8'), bcrypt.gensalt()).decode('utf-8') for p in passwords]
+
+
+async def hash_passwords(passwords: list[str]) -> list[str]:
+    """แบ่งรหัสผ่านเป็นชิ้นเท่าจำนวน worker แล้ว hash พร้อมกันใน process pool"""
+    if not passwords:
+        return []
+    executor = _get_executor()
+    loop = asyncio.get_running_loop()
+    size = -(-len(passwords) // USER_IMPORT_HASH_WORKERS)
+    chunks = [passwords[i:i + size] for i in range(0, len(passwords), size)]
+    results = await asyncio.gather(*(loop.run_in_executor(executor, _hash_many, chunk) for chunk in chunks))
+    return [hashed for chunk in results for hashed in chunk]
+
+
+def parse_rows(body: bytes, fmt: str) -> list[dict]:
+    """แปลง body แบบ JSON lines (jsonl) หรือ CSV (มี header) เป็น list ของ dict
+    บรรทัด JSON ที่ parse ไม่ได้ หรือแถว CSV ที่มีคอลัมน์เกิน header จะได้ค่า None เพื่อให้รายงานเป็น error รายแถว"""
+    try:
+        text = body.decode('utf-8-sig')
+    except UnicodeDecodeError:
+        raise HTTPException(status_code=400, detail="ไฟล์ต้องเข้ารหัสเป็น UTF-8")
+    if fmt == "csv":
+        # คอลัมน์ที่เกิน header ถูกเก็บไว้ใต้ key None
+        rows = [row if None not in row else None for row in csv.DictReader(io.StringIO(text))]
+    elif fmt == "jsonl":
+        rows = []
+        for line in text.splitlines():
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError:
+                row = None
+            rows.append(row if isinstance(row, dict) else None)
+    else:
+        raise HTTPException(status_code=400, detail="format ต้องเป็น jsonl หรือ csv")
+    if len(rows) > USER_IMPORT_MAX_ROWS:
+        raise HTTPException(status_code=413, detail=f"นำเข้าได้สูงสุด {USER_IMPORT_MAX_ROWS} แถวต่อครั้ง")
+    return rows
+
+
+def shutdown():
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
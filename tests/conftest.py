@@ -0,0 +1,79 @@
+import os
+import asyncio
+import tempfile
+
+import pytest
+
+# ใช้ SQLite ไฟล์ชั่วคราวแทน MySQL (ต้องตั้งค่าก่อน import แอป)
+_db_dir = tempfile.mkdtemp(prefix="workflow-test-")
+os.environ["DATABASE_URL"] = f"sqlite:///{_db_dir}/test.db"
+os.environ.setdefault("SECRET_KEY", "test-secret-key-for-the-test-suite-only")
+
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+import main
+from core.database import engine
+from application.po.models import Base as POBase
+from application.pr.prModels import Base as PRBase
+from setup.company.models import Base as CompanyBase
+from setup.project.models import Base as ProjectBase
+from setup.users.models import Base as UserBase
+from core.models import Base as CoreBase
+from setup.users.auth import create_access_token
+
+BASES = (POBase, PRBase, CompanyBase, ProjectBase, UserBase, CoreBase)
+
+
+async def _create_schema():
+    # server_default แบบ ON UPDATE ใช้ได้เฉพาะ MySQL
+    for table in UserBase.metadata.tables.values():
+        for column in table.columns:
+            if column.server_default is not None and "ON UPDATE" in str(getattr(column.server_default, "arg", "")):
+                column.server_default = None
+    async with engine.begin() as conn:
+        for base in BASES:
+            await conn.run_sync(base.metadata.create_all)
+
+
+@pytest.fixture(scope="session")
+def database():
+    asyncio.run(_create_schema())
+    return engine
+
+
+@pytest.fixture(scope="session")
+def client(database):
+    with TestClient(main.app) as client:
+        yield client
+
+
+@pytest.fixture(scope="session")
+def auth_headers(client):
+    headers = {"Authorization": "Bearer " + create_access_token({"sub": "test@example.com", "user_id": 1})}
+    # ผู้ใช้ m_id=1 สำหรับ endpoint ที่ใช้ get_current_user
+    user = dict(m_code="E001", m_firstname="test", m_lastname="user", m_user="test", m_position="p",
+                m_department="d", uimg="x", m_pass="pw", m_email="test@example.com")
+    assert client.post("/api/v1/users/", json=user, headers=headers).status_code == 200
+    return headers
+
+
+class QueryCounter:
+    """นับจำนวน SQL ที่ส่งไปยังฐานข้อมูล"""
+
+    def __init__(self):
+        self.statements = []
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+
+    def __len__(self):
+        return len(self.statements)
+
+
+@pytest.fixture
+def count_queries():
+    counter = QueryCounter()
+    event.listen(engine.sync_engine, "before_cursor_execute", counter)
+    yield counter
+    event.remove(engine.sync_engine, "before_cursor_execute", counter)
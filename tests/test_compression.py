@@ -0,0 +1,16 @@
+def test_compressed_response_gets_weak_etag(client, auth_headers):
+    item = dict(pri_matname="material " * 10, pri_matcode="M", pri_qty=2, pri_unit="u", pri_priceunit=1.5, pri_amount=3.0)
+    pr = dict(pr_prid=0, pr_prdate="2024-01-01", compcode="GZ", items=[item] * 20)
+    pr_id = client.post("/api/v1/purchase_requisition/pr/", json=pr, headers=auth_headers).json()["pr_prid"]
+    url = f"/api/v1/purchase_requisition/pr/{pr_id}"
+
+    identity = client.get(url, headers={**auth_headers, "Accept-Encoding": "identity"})
+    gzipped = client.get(url, headers={**auth_headers, "Accept-Encoding": "gzip"})
+    assert "content-encoding" not in identity.headers
+    assert gzipped.headers["content-encoding"] == "gzip"
+    assert gzipped.headers["etag"] == "W/" + identity.headers["etag"]
+
+    # If-None-Match เปรียบเทียบแบบ weak จึงยังได้ 304 จาก ETag ทั้งสองแบบ
+    for etag in (identity.headers["etag"], gzipped.headers["etag"]):
+        response = client.get(url, headers={**auth_headers, "Accept-Encoding": "gzip", "If-None-Match": etag})
+        assert response.status_code == 304
@@ -0,0 +1,99 @@
+import asyncio
+from datetime import date
+
+import httpx
+from sqlalchemy import insert, delete, select
+
+import main
+from core.database import engine, SessionLocal
+from core.docnumber import DocumentNumberAllocator, next_po_number, next_pr_number
+from core.migrations import _0005_seed_doc_counter
+from application.po.models import PurchaseOrder
+from application.pr.prModels import Pr
+
+CONCURRENT_REQUESTS = 300
+
+
+def test_concurrent_po_numbers_are_unique(database):
+    async def allocate():
+        return await asyncio.gather(*[next_po_number("DN1", date(2024, 3, 1)) for _ in range(CONCURRENT_REQUESTS)])
+
+    numbers = asyncio.run(allocate())
+    assert len({poid for poid, _ in numbers}) == CONCURRENT_REQUESTS
+    assert len({pono for _, pono in numbers}) == CONCURRENT_REQUESTS
+
+
+def test_concurrent_workers_with_blocks_are_unique(database):
+    # จำลองหลาย worker ที่จองเลขเป็น block จากตัวนับแถวเดียวกัน
+    workers = [DocumentNumberAllocator(block_size=7) for _ in range(4)]
+
+    async def allocate():
+        return await asyncio.gather(*[
+            workers[i % len(workers)].next_value("po", "DN2", 2024) for i in range(CONCURRENT_REQUESTS)
+        ])
+
+    values = asyncio.run(allocate())
+    assert len(set(values)) == CONCURRENT_REQUESTS
+
+
+def test_seed_doc_counter_continues_after_existing_numbers(database):
+
+    async def seed_and_allocate():
+        async with engine.begin() as conn:
+            await conn.execute(insert(PurchaseOrder), [
+                dict(po_poid=7, po_pono="PO2405-00041", po_podate=date(2024, 5, 2), compcode="SEED"),
+                dict(po_poid=8, po_pono="PO2406-00042", po_podate=date(2024, 6, 2), compcode="SEED"),
+                # รูปแบบเก่าที่ไม่ตรง pattern และปีอื่น ไม่นับ
+                dict(po_poid=9, po_pono="LEGACY-99999", po_podate=date(2024, 6, 3), compcode="SEED"),
+                dict(po_poid=10, po_pono="PO2312-00500", po_podate=date(2023, 12, 1), compcode="SEED"),
+            ])
+            await conn.execute(insert(Pr), [dict(pr_prno="PR2401-00010", pr_prdate=date(2024, 1, 5), compcode="SEED")])
+            await conn.run_sync(_0005_seed_doc_counter)
+            # รันซ้ำได้โดยไม่ลดค่าตัวนับ
+            await conn.run_sync(_0005_seed_doc_counter)
+        numbers = (
+            await next_po_number("SEED", date(2024, 7, 1)),
+            await next_po_number("SEED", date(2023, 12, 5)),
+            await next_pr_number("SEED", date(2024, 2, 1)),
+        )
+        async with engine.begin() as conn:
+            await conn.execute(delete(PurchaseOrder).where(PurchaseOrder.compcode == "SEED"))
+            await conn.execute(delete(Pr).where(Pr.compcode == "SEED"))
+        return numbers
+
+    po_2024, po_2023, pr_2024 = asyncio.run(seed_and_allocate())
+    assert po_2024 == (2024000043, "PO2407-00043")
+    assert po_2023 == (2023000501, "PO2312-00501")
+    assert pr_2024 == "PR2402-00011"
+
+
+def test_concurrent_po_creates_get_unique_numbers(client, auth_headers):
+
+    item = dict(pri_matname="m", pri_matcode="M", pri_qty=2, pri_unit="u", pri_priceunit=1.5, pri_amount=3.0)
+    pr_ids = []
+    for _ in range(CONCURRENT_REQUESTS // 3):
+        pr = dict(pr_prid=0, pr_prdate="2024-04-01", compcode="DN3", items=[item])
+        pr_ids.append(client.post("/api/v1/purchase_requisition/pr/", json=pr, headers=auth_headers).json()["pr_prid"])
+    pr_prno = client.get(f"/api/v1/purchase_requisition/pr/{pr_ids[0]}", headers=auth_headers).json()["pr_prno"]
+    po_item = dict(poi_matname="m", poi_matcode="M", poi_qty=1, poi_unit="u", poi_priceunit=1, poi_amount=1, poi_vatper=7, poid=0)
+    po = dict(po_podate="2024-04-02", po_project="P1", po_department="D", po_memid="1", po_venderid=1, po_vender="V",
+              po_prno=pr_prno, compcode="DN3", items=[po_item])
+
+    async def create_all():
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test", headers=auth_headers, timeout=120) as http:
+            requests = [http.post("/api/v1/purchase_order/", json=po) for _ in range(CONCURRENT_REQUESTS - len(pr_ids))]
+            requests += [http.post(f"/api/v1/purchase_order/from-pr/{pr_id}", json=dict(po_venderid=1, po_vender="V"))
+                         for pr_id in pr_ids]
+            responses = await asyncio.gather(*requests)
+        async with SessionLocal() as db:
+            rows = (await db.execute(
+                select(PurchaseOrder.po_poid, PurchaseOrder.po_pono).filter(PurchaseOrder.compcode == "DN3")
+            )).all()
+        return responses, rows
+
+    responses, rows = asyncio.run(create_all())
+    assert [response.status_code for response in responses] == [200] * CONCURRENT_REQUESTS
+    assert len(rows) == CONCURRENT_REQUESTS
+    assert len({poid for poid, _ in rows}) == CONCURRENT_REQUESTS
+    assert len({pono for _, pono in rows}) == CONCURRENT_REQUESTS
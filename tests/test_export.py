@@ -0,0 +1,91 @@
+import asyncio
+import tracemalloc
+from datetime import date
+from urllib.parse import urlencode
+
+import pytest
+from sqlalchemy import insert, select
+
+import main
+from core.database import SessionLocal
+from application.po.models import PurchaseOrder, PurchaseOrderItem
+
+EXPORT_COMPCODE = "EXP"
+EXPORT_PO_COUNT = 4000
+EXPORT_ITEMS_PER_PO = 10
+# เพดานหน่วยความจำของการ export ต้องต่ำกว่าขนาดไฟล์ที่ได้มาก (ไม่โหลดทุกแถวเข้าหน่วยความจำพร้อมกัน)
+EXPORT_PEAK_MEMORY_LIMIT = 6 * 1024 * 1024
+
+
+@pytest.fixture(scope="module")
+def export_rows(database):
+    async def seed():
+        async with SessionLocal() as db:
+            first_id = (await db.execute(select(PurchaseOrder.po_id).order_by(PurchaseOrder.po_id.desc()).limit(1))).scalar() or 0
+            po_ids = range(first_id + 1, first_id + 1 + EXPORT_PO_COUNT)
+            await db.execute(insert(PurchaseOrder), [
+                dict(po_id=po_id, po_pono=f"EXP-{po_id:06d}", po_podate=date(2024, 1, 1), po_project="P1",
+                     po_vender="vendor", po_venderid=1, compcode=EXPORT_COMPCODE)
+                for po_id in po_ids
+            ])
+            await db.execute(insert(PurchaseOrderItem), [
+                dict(poid=po_id, poi_matcode=f"M{line}", poi_matname="material " * 12, poi_qty=2, poi_unit="u",
+                     poi_priceunit=1.5, poi_amount=3.0, poi_vatper=7, compcode=EXPORT_COMPCODE)
+                for po_id in po_ids for line in range(EXPORT_ITEMS_PER_PO)
+            ])
+            await db.commit()
+
+    asyncio.run(seed())
+    return EXPORT_PO_COUNT * EXPORT_ITEMS_PER_PO
+
+
+async def stream_get(path, params, headers):
+    """ยิง GET ผ่าน ASGI app ทั้ง stack (middleware, auth, endpoint) แล้วนับ body ทีละ chunk โดยไม่เก็บไว้
+
+    TestClient/httpx รวม body ทั้งก้อนไว้ในหน่วยความจำก่อนคืนค่า จึงวัดหน่วยความจำของ streaming ผ่านมันไม่ได้
+    """
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET", "scheme": "http",
+        "path": path, "raw_path": path.encode(), "root_path": "", "query_string": urlencode(params).encode(),
+        "headers": [(k.lower().encode(), v.encode()) for k, v in headers.items()],
+        "client": ("testclient", 50000), "server": ("testserver", 80),
+    }
+    response = {"status": None, "bytes": 0, "lines": 0}
+    finished = asyncio.Event()
+
+    async def receive():
+        if finished.is_set():
+            return {"type": "http.disconnect"}
+        await finished.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            response["status"] = message["status"]
+        elif message["type"] == "http.response.body":
+            body = message.get("body", b"")
+            response["bytes"] += len(body)
+            response["lines"] += body.count(b"\n")
+            if not message.get("more_body", False):
+                finished.set()
+
+    await main.app(scope, receive, send)
+    return response
+
+
+@pytest.mark.parametrize("format", ["ndjson", "csv"])
+def test_export_memory_stays_bounded(export_rows, auth_headers, format):
+    params = {"compcode": EXPORT_COMPCODE, "format": format}
+
+    tracemalloc.start()
+    try:
+        response = asyncio.run(stream_get("/api/v1/purchase_order/export", params, auth_headers))
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    total_bytes = response["bytes"]
+    assert response["status"] == 200
+    assert response["lines"] == export_rows + (1 if format == "csv" else 0)
+    assert total_bytes > EXPORT_PEAK_MEMORY_LIMIT
+    assert peak < EXPORT_PEAK_MEMORY_LIMIT, f"export peak {peak} bytes for {total_bytes} bytes of output"
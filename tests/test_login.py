@@ -0,0 +1,78 @@
+import bcrypt
+
+from setup.users.passwords import password_hasher
+
+
+def login(client, email="test@example.com", password="pw"):
+    return client.post("/api/v1/login/login", json={"email": email, "password": password})
+
+
+def refresh(client, token):
+    return client.post("/api/v1/login/refresh", json={"refresh_token": token})
+
+
+def forbid_bcrypt(monkeypatch):
+    def fail(*args, **kwargs):
+        raise AssertionError("bcrypt must not be called")
+
+    monkeypatch.setattr(bcrypt, "checkpw", fail)
+    monkeypatch.setattr(bcrypt, "hashpw", fail)
+    monkeypatch.setattr(password_hasher, "checkpw", fail)
+
+
+def test_refresh_is_one_indexed_lookup_without_bcrypt(client, auth_headers, count_queries, monkeypatch):
+    token = login(client).json()["refresh_token"]
+    forbid_bcrypt(monkeypatch)
+
+    count_queries.statements.clear()
+    response = refresh(client, token)
+    assert response.status_code == 200
+    assert response.json()["access_token"]
+    # SELECT ด้วย token_hash 1 ครั้ง + UPDATE token เดิม + INSERT token ใหม่
+    verbs = [statement.split()[0].upper() for statement in count_queries.statements]
+    assert verbs == ["SELECT", "UPDATE", "INSERT"]
+    assert "token_hash" in count_queries.statements[0]
+
+
+def test_reusing_a_rotated_token_revokes_the_family(client, auth_headers):
+    first = login(client).json()["refresh_token"]
+    second = refresh(client, first).json()["refresh_token"]
+
+    # token แรกถูกหมุนไปแล้ว การใช้ซ้ำถือว่ารั่ว
+    assert refresh(client, first).status_code == 401
+    # token ล่าสุดของ family เดียวกันต้องใช้ไม่ได้ด้วย
+    assert refresh(client, second).status_code == 401
+
+    # login ใหม่ได้ family ใหม่ที่ไม่ถูกยกเลิก
+    assert refresh(client, login(client).json()["refresh_token"]).status_code == 200
+
+
+def test_login_burst_is_throttled_before_bcrypt(client, auth_headers, count_queries, monkeypatch):
+    from setup.users.login import login_account_limiter
+
+    user = dict(m_code="E002", m_firstname="burst", m_lastname="user", m_user="burst", m_position="p",
+                m_department="d", uimg="x", m_pass="right", m_email="burst@example.com")
+    assert client.post("/api/v1/users/", json=user, headers=auth_headers).status_code == 200
+
+    checks = []
+    checkpw = password_hasher.checkpw
+
+    async def counting_checkpw(password, hashed):
+        checks.append(password)
+        return await checkpw(password, hashed)
+
+    monkeypatch.setattr(password_hasher, "checkpw", counting_checkpw)
+
+    attempts = login_account_limiter.capacity + 5
+    statuses = []
+    for _ in range(attempts):
+        count_queries.statements.clear()
+        response = login(client, "burst@example.com", "wrong")
+        statuses.append(response.status_code)
+        if response.status_code == 429:
+            assert int(response.headers["Retry-After"]) >= 1
+            # ถูกปฏิเสธก่อนค้นหา member และก่อน bcrypt
+            assert len(count_queries) == 0
+
+    assert statuses == [401] * login_account_limiter.capacity + [429] * 5
+    assert len(checks) == login_account_limiter.capacity
@@ -0,0 +1,31 @@
+import base64
+import json
+
+import pytest
+
+
+def encode(value) -> str:
+    return base64.urlsafe_b64encode(json.dumps(value).encode("ascii")).decode("ascii").rstrip("=")
+
+
+@pytest.mark.parametrize("cursor", [encode([None, 1e400]), encode([None, "x"]), encode("x"), "!!"])
+def test_invalid_cursor_is_rejected(client, auth_headers, cursor):
+    response = client.get("/api/v1/purchase_order/", params={"cursor": cursor}, headers=auth_headers)
+    assert response.status_code == 400
+
+
+@pytest.mark.parametrize("url", [
+    "/api/v1/purchase_order/",
+    "/api/v1/users/",
+    "/api/v1/projects/",
+    "/api/v1/purchase_requisition/prs/",
+])
+@pytest.mark.parametrize("params", [{"limit": 0}, {"limit": -1}, {"skip": -1}])
+def test_list_rejects_out_of_range_paging(client, auth_headers, url, params):
+    assert client.get(url, params=params, headers=auth_headers).status_code == 422
+
+
+@pytest.mark.parametrize("page", [{"limit": 0}, {"limit": -5}, {"skip": -1}])
+def test_company_filter_rejects_out_of_range_paging(client, auth_headers, page):
+    response = client.post("/api/v1/company/companies/filter", json={"search": "", "page": page}, headers=auth_headers)
+    assert response.status_code == 422
@@ -0,0 +1,35 @@
+import pytest
+
+
+def pr_with_items(client, auth_headers, item_count):
+    item = dict(pri_matname="m", pri_matcode="M", pri_qty=2, pri_unit="u", pri_priceunit=1.5, pri_amount=3.0)
+    pr = dict(pr_prid=0, pr_prdate="2024-01-01", compcode="POC", items=[item] * item_count)
+    response = client.post("/api/v1/purchase_requisition/pr/", json=pr, headers=auth_headers)
+    assert response.status_code == 200
+    return response.json()
+
+
+def po_from(pr):
+    items = [
+        dict(poi_matname=item["pri_matname"], poi_matcode=item["pri_matcode"], poi_qty=item["pri_qty"],
+             poi_unit=item["pri_unit"], poi_priceunit=item["pri_priceunit"], poi_amount=item["pri_amount"],
+             poi_vatper=7, poid=0, compcode=pr["compcode"], pri_id=item["pri_id"])
+        for item in pr["items"]
+    ]
+    return dict(po_podate="2024-01-02", po_project="P1", po_department="D", po_memid="1", po_venderid=1,
+                po_vender="V", po_prno=pr["pr_prno"], compcode=pr["compcode"], items=items)
+
+
+def test_create_po_query_count_does_not_grow_with_items(client, auth_headers, count_queries):
+    counts = {}
+    for item_count in (10, 100, 1000):
+        body = po_from(pr_with_items(client, auth_headers, item_count))
+        count_queries.statements.clear()
+        response = client.post("/api/v1/purchase_order/", json=body, headers=auth_headers)
+        assert response.status_code == 200
+        counts[item_count] = len(count_queries)
+
+        po = client.get(f"/api/v1/purchase_order/{response.json()['po_id']}", headers=auth_headers).json()
+        assert len(po["items"]) == item_count
+
+    assert counts[10] == counts[100] == counts[1000], counts
@@ -0,0 +1,46 @@
+import asyncio
+
+from sqlalchemy import update
+
+from core.database import SessionLocal
+from setup.users.auth import create_access_token
+from setup.users.models import User
+
+PRS_URL = "/api/v1/purchase_requisition/prs/"
+
+
+def create_pr(client, auth_headers, compcode, project):
+    pr = dict(pr_prid=0, pr_prdate="2024-02-01", compcode=compcode, pr_project=project)
+    assert client.post("/api/v1/purchase_requisition/pr/", json=pr, headers=auth_headers).status_code == 200
+
+
+def test_filter_without_compcode_uses_the_users_company(client, auth_headers):
+    user = dict(m_code="E003", m_firstname="company", m_lastname="user", m_user="cu", m_position="p",
+                m_department="d", uimg="x", m_pass="pw", m_email="company-user@example.com")
+    assert client.post("/api/v1/users/", json=user, headers=auth_headers).status_code == 200
+
+    async def assign_company():
+        async with SessionLocal() as db:
+            user_id = (await db.execute(
+                update(User).where(User.m_email == user["m_email"]).values(compcode="FLT1").returning(User.m_id)
+            )).scalar_one()
+            await db.commit()
+        return user_id
+
+    headers = {"Authorization": "Bearer " + create_access_token({"sub": user["m_email"], "user_id": asyncio.run(assign_company())})}
+    create_pr(client, auth_headers, "FLT1", "SHARED")
+    create_pr(client, auth_headers, "FLT2", "SHARED")
+
+    response = client.get(PRS_URL, params={"pr_project": "SHARED"}, headers=headers)
+    assert response.status_code == 200
+    assert {pr["compcode"] for pr in response.json()} == {"FLT1"}
+
+    # ระบุ compcode เองได้เสมอ
+    response = client.get(PRS_URL, params={"pr_project": "SHARED", "compcode": "FLT2"}, headers=headers)
+    assert {pr["compcode"] for pr in response.json()} == {"FLT2"}
+
+
+def test_filter_without_compcode_requires_one(client, auth_headers):
+    # ผู้ใช้ใน auth_headers ไม่มี compcode
+    assert client.get(PRS_URL, params={"pr_status": "enable"}, headers=auth_headers).status_code == 400
+    assert client.get(PRS_URL, headers=auth_headers).status_code == 200
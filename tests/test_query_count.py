@@ -0,0 +1,36 @@
+import pytest
+
+DOC_COUNT = 60
+
+
+@pytest.fixture(scope="module")
+def seeded_documents(client, auth_headers):
+    # PR ละ 2 รายการ และเปิด PO จากทุก PR (PO ละ 2 รายการ)
+    item = dict(pri_matname="m", pri_matcode="M", pri_qty=2, pri_unit="u", pri_priceunit=1.5, pri_amount=3.0)
+    for _ in range(DOC_COUNT):
+        pr = dict(pr_prid=0, pr_prdate="2024-01-01", compcode="QC", items=[item, item])
+        response = client.post("/api/v1/purchase_requisition/pr/", json=pr, headers=auth_headers)
+        assert response.status_code == 200
+        po = dict(po_venderid=1, po_vender="V")
+        response = client.post(f"/api/v1/purchase_order/from-pr/{response.json()['pr_prid']}", json=po, headers=auth_headers)
+        assert response.status_code == 200
+
+
+def list_query_count(client, auth_headers, count_queries, url, params, limit):
+    count_queries.statements.clear()
+    response = client.get(url, params={**params, "limit": limit}, headers=auth_headers)
+    assert response.status_code == 200
+    body = response.json()
+    assert len(body) == limit
+    assert all(row["items"] for row in body)
+    return len(count_queries)
+
+
+@pytest.mark.parametrize("url, params", [
+    ("/api/v1/purchase_requisition/prs/", {"compcode": "QC", "include_items": "true"}),
+    ("/api/v1/purchase_order/", {}),
+])
+def test_list_query_count_does_not_grow_with_limit(client, auth_headers, seeded_documents, count_queries, url, params):
+    small = list_query_count(client, auth_headers, count_queries, url, params, 5)
+    large = list_query_count(client, auth_headers, count_queries, url, params, 50)
+    assert large == small
@@ -0,0 +1,80 @@
+import time
+import asyncio
+from datetime import date
+
+import pytest
+from sqlalchemy import insert
+
+import core.database
+from core.database import Replica, SessionLocal, engine
+from application.pr.prModels import Base as PRBase, Pr
+from setup.users.auth import create_access_token
+
+COMPCODE = "REPL"
+
+
+@pytest.fixture
+def replicas(database, tmp_path, monkeypatch):
+    healthy = Replica(f"sqlite:///{tmp_path}/replica.db")
+    # ไดเรกทอรีไม่มีอยู่จริง เชื่อมต่อไม่ได้
+    unreachable = Replica(f"sqlite:///{tmp_path}/missing/replica.db")
+
+    async def seed():
+        # primary กับ replica มีข้อมูลต่างกันเพื่อให้รู้ว่าอ่านจากฝั่งไหน
+        async with engine.begin() as conn:
+            await conn.execute(insert(Pr).values(pr_prno="FROM-PRIMARY", pr_prdate=date(2024, 1, 1), compcode=COMPCODE))
+        async with healthy.engine.begin() as conn:
+            await conn.run_sync(PRBase.metadata.create_all)
+            await conn.execute(insert(Pr).values(pr_prno="FROM-REPLICA", pr_prdate=date(2024, 1, 1), compcode=COMPCODE))
+        await healthy.engine.dispose()
+
+    asyncio.run(seed())
+    monkeypatch.setattr(core.database, "replicas", [unreachable, healthy])
+    yield healthy, unreachable
+
+    async def dispose():
+        for replica in (healthy, unreachable):
+            await replica.engine.dispose()
+
+    asyncio.run(dispose())
+
+
+def client_headers(name):
+    # client แยกกันด้วย token (ใช้เป็น key ของ read-your-writes)
+    return {"Authorization": "Bearer " + create_access_token({"sub": f"{name}@example.com", "user_id": 1})}
+
+
+def read_source(client, headers):
+    response = client.get("/api/v1/purchase_requisition/prs/", params={"compcode": COMPCODE}, headers=headers)
+    assert response.status_code == 200
+    return {pr["pr_prno"] for pr in response.json()}
+
+
+def test_reads_skip_unreachable_replica(client, auth_headers, replicas):
+    healthy, unreachable = replicas
+    headers = client_headers("replica-reader")
+    for _ in range(4):
+        assert read_source(client, headers) == {"FROM-REPLICA"}
+    # replica ที่เชื่อมต่อไม่ได้ถูกพักไว้ ไม่ถูกลองซ้ำทุก request
+    assert unreachable.unhealthy_until > time.monotonic()
+    assert healthy.unhealthy_until <= time.monotonic()
+    stats = {stat["replica"]: stat["healthy"] for stat in core.database.replica_stats()}
+    assert stats == {unreachable.name: False, healthy.name: True}
+
+
+def test_reads_fall_back_to_primary_without_healthy_replica(client, auth_headers, replicas, monkeypatch):
+    _, unreachable = replicas
+    monkeypatch.setattr(core.database, "replicas", [unreachable])
+    assert read_source(client, client_headers("fallback-reader")) == {"FROM-PRIMARY"}
+    assert unreachable.unhealthy_until > time.monotonic()
+
+
+def test_reads_stick_to_primary_after_write(client, auth_headers, replicas):
+    writer, other = client_headers("writer"), client_headers("other")
+    assert read_source(client, writer) == {"FROM-REPLICA"}
+
+    response = client.post("/api/v1/login/logout", json={"refresh_token": "unknown"}, headers=writer)
+    assert response.status_code == 200
+    # client ที่เพิ่งเขียนอ่านจาก primary ส่วน client อื่นยังอ่านจาก replica
+    assert read_source(client, writer) == {"FROM-PRIMARY"}
+    assert read_source(client, other) == {"FROM-REPLICA"}
@@ -0,0 +1,21 @@
+CSV_HEADER = "m_code,m_firstname,m_lastname,m_user,m_pass,m_email,m_position,m_department,uimg\n"
+
+
+def test_csv_row_with_extra_columns_is_a_row_error(client, auth_headers):
+    body = (
+        CSV_HEADER
+        + "1,a,b,u,secret,import1@example.com,p,d,x\n"
+        + "1,a,b,u,secret,import2@example.com,p,d,x,extra\n"
+        + "1,a,b,u,secret,import3@example.com,p,d,x\n"
+    )
+    response = client.post("/api/v1/users/import", params={"format": "csv"}, content=body, headers=auth_headers)
+    assert response.status_code == 200
+    result = response.json()
+    assert result["created"] == 2
+    assert [error["row"] for error in result["errors"]] == [2]
+
+
+def test_non_utf8_body_is_rejected(client, auth_headers):
+    body = (CSV_HEADER + "1,ก,b,u,secret,import4@example.com,p,d,x\n").encode("tis-620")
+    response = client.post("/api/v1/users/import", params={"format": "csv"}, content=body, headers=auth_headers)
+    assert response.status_code == 400